@@ -57,7 +57,8 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-ROOT_URLCONF = "app.urls"
+# app.asgi switches to app.urls_async, which adds native async reads
+ROOT_URLCONF = os.environ.get("DJANGO_ROOT_URLCONF", "app.urls")
 
 TEMPLATES = [
     {
@@ -91,6 +92,56 @@ DATABASES = {
         "NAME": os.environ.get("DB_NAME"),
         "USER": os.environ.get("DB_USER"),
         "PASSWORD": os.environ.get("DB_PASSWORD"),
+        # keep each worker's connection for this many seconds, checking it
+        # is still alive before reusing it
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": bool(int(os.environ.get("DB_CONN_HEALTH_CHECKS", 1))),
+    }
+}
+
+# DB_POOL=1 switches to psycopg 3's connection pool (one per process), which
+# replaces persistent connections.
+if bool(int(os.environ.get("DB_POOL", 0))):
+    DB_POOL_OPTIONS = {
+        "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+        "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 4)),
+        "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", 600)),
+    }
+
+    if DATABASES["default"]["CONN_HEALTH_CHECKS"]:
+        from psycopg_pool import ConnectionPool
+
+        DB_POOL_OPTIONS["check"] = ConnectionPool.check_connection
+
+    DATABASES["default"]["OPTIONS"] = {"pool": DB_POOL_OPTIONS}
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+#
+# CACHE_BACKEND picks one of "locmem" (per worker, the default), "file" or
+# "redis" (shared between workers and containers). The list cache and its
+# version counters must be shared by every process serving the API, so
+# docker-compose-deploy.yml runs redis.
+
+CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "recipe-app"),
+    "file": ("django.core.cache.backends.filebased.FileBasedCache", "/vol/web/cache"),
+    "redis": ("django.core.cache.backends.redis.RedisCache", "redis://redis:6379/0"),
+    "dummy": ("django.core.cache.backends.dummy.DummyCache", ""),
+}
+CACHE_BACKEND, CACHE_DEFAULT_LOCATION = CACHE_BACKENDS[
+    os.environ.get("CACHE_BACKEND", "locmem")
+]
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": os.environ.get("CACHE_LOCATION") or CACHE_DEFAULT_LOCATION,
+        "TIMEOUT": int(os.environ.get("CACHE_TIMEOUT", 300)),
+        "KEY_PREFIX": os.environ.get("CACHE_KEY_PREFIX", "recipe-app"),
     }
 }
 
@@ -134,6 +185,40 @@ MEDIA_URL = "/static/media/"
 MEDIA_ROOT = "/vol/web/media/"
 STATIC_ROOT = "/vol/web/static/"
 
+# Uploads are named by content hash so identical files are stored once,
+# `manage.py gc_media` removes the ones nothing references.
+#
+# With STATIC_MANIFEST=1 collectstatic writes hashed, precompressed assets
+# which the proxy serves as immutable.
+STORAGES = {
+    "default": {"BACKEND": "core.storage.ContentAddressedStorage"},
+    "staticfiles": {
+        "BACKEND": (
+            "core.storage.CompressedManifestStaticFilesStorage"
+            if bool(int(os.environ.get("STATIC_MANIFEST", 0)))
+            else "django.contrib.staticfiles.storage.StaticFilesStorage"
+        ),
+    },
+}
+
+# How access-controlled media leaves the app: "django" streams it from the
+# worker, "accel" hands it to nginx via X-Accel-Redirect and "sendfile" via
+# X-Sendfile.
+MEDIA_DELIVERY = os.environ.get("MEDIA_DELIVERY", "django")
+MEDIA_ACCEL_PREFIX = "/protected-media/"
+
+# Uploaded recipe images are streamed to disk and checked from their headers
+# against these limits before anything decodes them.
+RECIPE_IMAGE_MAX_BYTES = int(os.environ.get("RECIPE_IMAGE_MAX_BYTES", 10 * 1024 * 1024))
+RECIPE_IMAGE_MAX_PIXELS = int(os.environ.get("RECIPE_IMAGE_MAX_PIXELS", 40_000_000))
+
+# Bulk imports commit in chunks; a body over RECIPE_IMPORT_MAX_BYTES is
+# refused up front and reading stops after RECIPE_IMPORT_MAX_ROWS rows.
+RECIPE_IMPORT_MAX_BYTES = int(
+    os.environ.get("RECIPE_IMPORT_MAX_BYTES", 10 * 1024 * 1024)
+)
+RECIPE_IMPORT_MAX_ROWS = int(os.environ.get("RECIPE_IMPORT_MAX_ROWS", 10000))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -143,4 +228,16 @@ AUTH_USER_MODEL = "core.User"
 
 REST_FRAMEWORK = {"DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema"}
 
+# Resolved auth tokens are kept per process for TOKEN_AUTH_CACHE_TTL seconds
+# and, when TOKEN_AUTH_SHARED_CACHE names a cache alias, shared through it.
+# Revocations reach every process through a version in the default cache;
+# the short TTL bounds changes made without signals, e.g. QuerySet.update().
+TOKEN_AUTH_CACHE_SIZE = int(os.environ.get("TOKEN_AUTH_CACHE_SIZE", 10000))
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get("TOKEN_AUTH_CACHE_TTL", 5))
+TOKEN_AUTH_SHARED_CACHE = os.environ.get("TOKEN_AUTH_SHARED_CACHE") or None
+
 SPECTACULAR_SETTINGS = {"COMPONENT_SPLIT_REQUEST": True}
+
+# build_schema writes the OpenAPI schema here, otherwise it is generated on
+# first request
+API_SCHEMA_ROOT = os.environ.get("API_SCHEMA_ROOT") or None
@@ -16,22 +16,25 @@ Including another URLconf
 """
 
 from django.contrib import admin
-from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from django.urls import path, include, re_path
 from django.conf.urls.static import static
 from django.conf import settings
 from core import views as core_views
+from core.views import lazy_view
 
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/health-check/", core_views.health_check, name="health-check"),
-    path("api/schema/", SpectacularAPIView.as_view(), name="api-schema"),
-    path(
-        "api/docs/",
-        SpectacularSwaggerView.as_view(url_name="api-schema"),
-        name="api-docs",
+    path("api/cache-stats/", core_views.cache_stats, name="cache-stats"),
+    path("api/db-stats/", core_views.db_stats, name="db-stats"),
+    path("api/schema/", core_views.schema, name="api-schema"),
+    re_path(
+        r"^api/schema/(?P<digest>[0-9a-f]+)\.(?P<fmt>json|yaml)$",
+        core_views.schema_file,
+        name="api-schema-file",
     ),
+    path("api/docs/", lazy_view("core.docs.SwaggerView"), name="api-docs"),
     path("api/user/", include("user.urls")),
     path("api/recipe/", include("recipe.urls")),
 ]
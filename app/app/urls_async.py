@@ -0,0 +1,27 @@
+"""
+URL configuration of the ASGI entry point.
+
+Reads of recipes, tags and ingredients go to the native async views in
+`recipe.async_views`; every other request is routed as in `app.urls`.
+"""
+
+from django.urls import path
+
+from app.urls import urlpatterns as sync_urlpatterns
+from recipe import async_views
+
+urlpatterns = [
+    path("api/recipe/recipes/", async_views.recipe_list, name="async-recipe-list"),
+    path(
+        "api/recipe/recipes/<int:pk>/",
+        async_views.recipe_detail,
+        name="async-recipe-detail",
+    ),
+    path("api/recipe/tags/", async_views.tag_list, name="async-tag-list"),
+    path(
+        "api/recipe/ingredients/",
+        async_views.ingredient_list,
+        name="async-ingredient-list",
+    ),
+    *sync_urlpatterns,
+]
@@ -7,10 +7,17 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
 """
 
+import gc
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+# import every view, serializer and model before uWSGI forks the workers,
+# then keep the GC from writing to those shared pages
+get_resolver().url_patterns
+gc.freeze()
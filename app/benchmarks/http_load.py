@@ -0,0 +1,157 @@
+"""
+Throughput and latency of API reads over keep-alive connections.
+
+Opens `--concurrency` connections and has each one issue GET requests
+round-robin over the given URLs for `--duration` seconds, then prints
+requests per second and latency percentiles. Point it at the proxy
+started with ASGI_READS=off and then =on to compare the uWSGI and ASGI
+read paths; keep the routing off unless the ASGI run wins.
+
+    python -m benchmarks.http_load http://localhost/api/recipe/recipes/ \\
+        --token <key> [--concurrency 50] [--duration 30]
+
+Standard library only, so it runs from any checkout without Django.
+"""
+
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+class Target:
+    def __init__(self, url):
+        parts = urlsplit(url)
+
+        if parts.scheme != "http":
+            raise SystemExit(f"only plain http is supported: {url}")
+
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = parts.path or "/"
+
+        if parts.query:
+            self.path += "?" + parts.query
+
+    def request(self, token):
+        lines = [
+            f"GET {self.path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Accept: application/json",
+            "Connection: keep-alive",
+        ]
+
+        if token:
+            lines.append(f"Authorization: Token {token}")
+
+        return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+
+    if not status_line:
+        raise ConnectionError("connection closed")
+
+    status = int(status_line.split()[1])
+    headers = {}
+
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while size := int((await reader.readline()).split(b";")[0], 16):
+            await reader.readexactly(size + 2)
+        # trailers end with an empty line
+        while await reader.readline() not in (b"\r\n", b""):
+            pass
+    else:
+        await reader.readexactly(int(headers.get("content-length", 0)))
+
+    connection = headers.get("connection", "").lower()
+
+    if status_line.startswith(b"HTTP/1.0"):
+        return status, connection == "keep-alive"
+
+    return status, connection != "close"
+
+
+async def client(targets, token, deadline, latencies, statuses):
+    targets = itertools.cycle(targets)
+    connection = None
+
+    while time.monotonic() < deadline:
+        target = next(targets)
+
+        if connection is None or connection[0] != (target.host, target.port):
+            if connection is not None:
+                connection[2].close()
+            reader, writer = await asyncio.open_connection(target.host, target.port)
+            connection = ((target.host, target.port), reader, writer)
+
+        _, reader, writer = connection
+        start = time.perf_counter()
+        writer.write(target.request(token))
+
+        try:
+            status, keep_alive = await read_response(reader)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+            connection = None
+            statuses["error"] = statuses.get("error", 0) + 1
+            continue
+
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+
+        if not keep_alive:
+            writer.close()
+            connection = None
+
+    if connection is not None:
+        connection[2].close()
+
+
+async def run(targets, token, concurrency, duration):
+    latencies, statuses = [], {}
+    deadline = time.monotonic() + duration
+
+    await asyncio.gather(
+        *(
+            client(targets, token, deadline, latencies, statuses)
+            for _ in range(concurrency)
+        )
+    )
+
+    return latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--token")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30)
+    args = parser.parse_args()
+
+    targets = [Target(url) for url in args.urls]
+    latencies, statuses = asyncio.run(
+        run(targets, args.token, args.concurrency, args.duration)
+    )
+
+    if len(latencies) < 2:
+        raise SystemExit(f"too few responses: {statuses}")
+
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"requests     {len(latencies)}  {statuses}")
+    print(f"throughput   {len(latencies) / args.duration:8.1f} req/s")
+
+    for name, value in (("p50", cuts[49]), ("p95", cuts[94]), ("p99", cuts[98])):
+        print(f"{name:12} {value * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Peak memory of parsing and validating one recipe image upload.
+
+Compares Django's default upload handlers plus DRF's ImageField (which
+opens and verifies the whole image) with BoundedImageUploadHandler plus
+BoundedImageField. No database is needed. Uploads under Django's 2.5 MB
+FILE_UPLOAD_MAX_MEMORY_SIZE are where the default path buffers the most;
+tracemalloc only sees Python allocations, not Pillow's decoder buffers.
+
+    python -m benchmarks.image_upload [--megapixels 2]
+"""
+
+import argparse
+import io
+import os
+import random
+import tracemalloc
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+django.setup()
+
+from django.core.files.uploadhandler import (  # noqa: E402
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+from django.http.multipartparser import MultiPartParser  # noqa: E402
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart  # noqa
+from django.test.utils import override_settings  # noqa: E402
+from PIL import Image  # noqa: E402
+from rest_framework import serializers  # noqa: E402
+
+from recipe.uploads import BoundedImageField, BoundedImageUploadHandler  # noqa
+
+
+def make_jpeg(megapixels):
+    side = int((megapixels * 1_000_000) ** 0.5)
+    noise = random.Random(0).randbytes(side * side * 3)
+    image = Image.frombytes("RGB", (side, side), noise)
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=95)
+
+    return buffer.getvalue()
+
+
+def measure(body, handlers, field):
+    meta = {
+        "CONTENT_TYPE": MULTIPART_CONTENT,
+        "CONTENT_LENGTH": str(len(body)),
+    }
+
+    tracemalloc.start()
+    parser = MultiPartParser(meta, io.BytesIO(body), handlers)
+    _, files = parser.parse()
+    field.run_validation(files["image"])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    files["image"].close()
+
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megapixels", type=float, default=2)
+    args = parser.parse_args()
+
+    jpeg = io.BytesIO(make_jpeg(args.megapixels))
+    jpeg.name = "photo.jpg"
+    body = encode_multipart(BOUNDARY, {"image": jpeg})
+    print(f"upload body: {len(body) / 2**20:.1f} MiB")
+
+    with override_settings(
+        RECIPE_IMAGE_MAX_BYTES=len(body),
+        RECIPE_IMAGE_MAX_PIXELS=10**9,
+    ):
+        default = measure(
+            body,
+            [MemoryFileUploadHandler(), TemporaryFileUploadHandler()],
+            serializers.ImageField(),
+        )
+        bounded = measure(body, [BoundedImageUploadHandler()], BoundedImageField())
+
+    print(f"default handlers + ImageField:  {default / 2**20:8.2f} MiB peak")
+    print(f"bounded handler + header check: {bounded / 2**20:8.2f} MiB peak")
+
+
+if __name__ == "__main__":
+    main()
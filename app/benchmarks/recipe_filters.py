@@ -0,0 +1,110 @@
+"""
+Query plans and timings of the recipe list filtered by tags.
+
+Fills a throwaway test database with `--recipes` recipes, each linked to a
+few of `--tags` tags, then compares the old join + DISTINCT filter with the
+EXISTS filters used by RecipeViewSet for `match=any` and `match=all`. Run it
+against PostgreSQL to see the plan change; SQLite works but its planner
+says little.
+
+    python -m benchmarks.recipe_filters [--recipes 100000] [--tags 50]
+"""
+
+import argparse
+import os
+import random
+import time
+from decimal import Decimal
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.models import Exists, OuterRef  # noqa: E402
+
+from core.models import Recipe, Tag  # noqa: E402
+
+TAGS_PER_RECIPE = 4
+BATCH_SIZE = 5000
+
+
+def populate(recipe_count, tag_count):
+    user = get_user_model().objects.create_user("bench@example.com", "bench")
+    tags = Tag.objects.bulk_create(
+        Tag(user=user, name=f"tag{i}") for i in range(tag_count)
+    )
+    rng = random.Random(0)
+    Link = Recipe.tags.through
+
+    for start in range(0, recipe_count, BATCH_SIZE):
+        recipes = Recipe.objects.bulk_create(
+            Recipe(user=user, title=f"r{i}", time_minutes=10, price=Decimal("1"))
+            for i in range(start, min(start + BATCH_SIZE, recipe_count))
+        )
+        Link.objects.bulk_create(
+            Link(recipe_id=recipe.id, tag_id=tag.id)
+            for recipe in recipes
+            for tag in rng.sample(tags, TAGS_PER_RECIPE)
+        )
+
+    return user, tags[:3]
+
+
+def queries(user, tags):
+    ids = [tag.id for tag in tags]
+    base = Recipe.objects.filter(user=user).order_by("-id")
+    links = Recipe.tags.through.objects.filter(recipe_id=OuterRef("pk"))
+
+    return {
+        "join + DISTINCT": base.filter(tags__id__in=ids).distinct(),
+        "EXISTS, match=any": base.filter(Exists(links.filter(tag_id__in=ids))),
+        "EXISTS, match=all": base.filter(
+            *[Exists(links.filter(tag_id=pk)) for pk in ids]
+        ),
+    }
+
+
+def measure(queryset, repeat):
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = len(queryset.values_list("id", flat=True))
+        best = min(best, time.perf_counter() - start)
+
+    return count, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--tags", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-plans", action="store_true")
+    args = parser.parse_args()
+
+    old_name = connection.creation.create_test_db(verbosity=0, keepdb=False)
+
+    try:
+        user, tags = populate(args.recipes, args.tags)
+        analyze = {"analyze": True} if connection.vendor == "postgresql" else {}
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+        for name, queryset in queries(user, tags).items():
+            count, best = measure(queryset, args.repeat)
+            print(f"{name:20} {count:7} rows  {best * 1000:8.1f} ms")
+
+            if not args.no_plans:
+                print(queryset.values_list("id").explain(**analyze), end="\n\n")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Versioned cache keys and hit/miss accounting on top of the default cache
+"""
+
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+_MISSING = object()
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _record(namespace, outcome):
+    with _stats_lock:
+        _stats[namespace, outcome] += 1
+
+
+def stats():
+    """Return this process's hit/miss counters grouped by namespace."""
+    with _stats_lock:
+        snapshot = dict(_stats)
+
+    result = {}
+
+    for (namespace, outcome), count in snapshot.items():
+        result.setdefault(namespace, {"hits": 0, "misses": 0})[outcome] = count
+
+    return result
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _version_key(scope):
+    return f"version:{scope}"
+
+
+def _initial_version():
+    # a version key evicted from the cache must not restart at a number
+    # whose entries may still be cached, so seed it from the clock
+    return time.time_ns()
+
+
+def get_version(scope):
+    key = _version_key(scope)
+    version = cache.get(key)
+
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key, _initial_version())
+
+    return version
+
+
+def bump_version(scope):
+    """Invalidate every key made for `scope` in O(1)."""
+    key = _version_key(scope)
+
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), timeout=None)
+
+        return cache.incr(key)
+
+
+def make_key(namespace, scope, *parts):
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+    return f"{namespace}:{scope}:{get_version(scope)}:{digest}"
+
+
+def get_or_set(namespace, key, producer, timeout=None):
+    value = cache.get(key, _MISSING)
+
+    if value is not _MISSING:
+        _record(namespace, "hits")
+        return value
+
+    _record(namespace, "misses")
+    value = producer()
+
+    if timeout is None:
+        cache.set(key, value)
+    else:
+        cache.set(key, value, timeout)
+
+    return value
+
+
+async def aget_or_set(namespace, key, producer, timeout=None):
+    """`get_or_set` for async views, awaiting the coroutine `producer`.
+
+    The cache calls run in the executor, not on the thread the async ORM
+    shares with every other sync call, which `cache.aget` would use.
+    """
+    value = await sync_to_async(cache.get, thread_sensitive=False)(key, _MISSING)
+
+    if value is not _MISSING:
+        _record(namespace, "hits")
+        return value
+
+    _record(namespace, "misses")
+    value = await producer()
+    cache_set = sync_to_async(cache.set, thread_sensitive=False)
+
+    if timeout is None:
+        await cache_set(key, value)
+    else:
+        await cache_set(key, value, timeout)
+
+    return value
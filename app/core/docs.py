@@ -0,0 +1,32 @@
+"""
+Swagger UI over the precomputed OpenAPI schema
+"""
+
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from drf_spectacular.views import SpectacularSwaggerView
+
+from core.schema import get_schema
+
+
+class SwaggerView(SpectacularSwaggerView):
+    """Swagger UI loading the schema from its immutable, hashed URL.
+
+    The page only changes with the schema, so it is tagged with its hash.
+    """
+
+    def get(self, request, *args, **kwargs):
+        etag = quote_etag(f"docs.{get_schema().digest}")
+        response = get_conditional_response(request, etag=etag)
+
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        response["ETag"] = etag
+        patch_cache_control(response, public=True, no_cache=True)
+
+        return response
+
+    def _get_schema_url(self, request):
+        return reverse("api-schema-file", args=[get_schema().digest, "json"])
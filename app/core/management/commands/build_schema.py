@@ -0,0 +1,29 @@
+"""
+Write the OpenAPI schema to API_SCHEMA_ROOT, ready to be served
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import schema
+
+
+class Command(BaseCommand):
+    """Django command to precompute the OpenAPI schema"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=settings.API_SCHEMA_ROOT,
+            help="Directory to write to, defaults to API_SCHEMA_ROOT",
+        )
+
+    def handle(self, *args, **options):
+        if not options["output"]:
+            raise CommandError("set API_SCHEMA_ROOT or pass --output")
+
+        built = schema.generate()
+        schema.write(built, options["output"])
+
+        for schema_format in built.documents:
+            self.stdout.write(schema.file_name(built.digest, schema_format))
@@ -0,0 +1,77 @@
+"""
+Delete uploaded media files no recipe references any more
+"""
+
+import posixpath
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import ImageJob, Recipe
+
+
+def walk(storage, directory):
+    directories, files = storage.listdir(directory)
+
+    for name in files:
+        yield posixpath.join(directory, name)
+
+    for child in directories:
+        yield from walk(storage, posixpath.join(directory, child))
+
+
+def referenced_names():
+    """Count references per stored name across recipes and queued jobs."""
+    counts = {}
+
+    recipes = Recipe.objects.exclude(image="").exclude(image=None)
+    for image, variants in recipes.values_list("image", "image_variants").iterator():
+        for name in [image, *variants.values()]:
+            counts[name] = counts.get(name, 0) + 1
+
+    jobs = ImageJob.objects.filter(status__in=[ImageJob.PENDING, ImageJob.RUNNING])
+    for name in jobs.values_list("image_name", flat=True):
+        counts[name] = counts.get(name, 0) + 1
+
+    return counts
+
+
+class Command(BaseCommand):
+    """Django command to garbage-collect unreferenced uploads"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--root", default="uploads")
+        parser.add_argument(
+            "--grace-minutes",
+            type=int,
+            default=60,
+            help="Keep files modified this recently, they may be mid-upload.",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        storage = Recipe._meta.get_field("image").storage
+
+        if not storage.exists(options["root"]):
+            self.stdout.write("nothing to collect")
+            return
+
+        cutoff = timezone.now() - timedelta(minutes=options["grace_minutes"])
+        references = referenced_names()
+        removed = freed = 0
+
+        for name in walk(storage, options["root"]):
+            if references.get(name) or storage.get_modified_time(name) > cutoff:
+                continue
+
+            freed += storage.size(name)
+            removed += 1
+
+            if not options["dry_run"]:
+                storage.delete(name)
+
+        verb = "would remove" if options["dry_run"] else "removed"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {removed} files, {freed} bytes")
+        )
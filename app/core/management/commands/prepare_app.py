@@ -0,0 +1,82 @@
+"""
+Run collectstatic and migrate, each only when it has something to do
+"""
+
+import hashlib
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+# kept in STATIC_ROOT, so a fresh static volume always gets collected
+STATIC_FINGERPRINT = ".collectstatic-fingerprint"
+
+# collectstatic's default ignore_patterns
+IGNORE_PATTERNS = ["CVS", ".*", "*~"]
+
+
+def static_fingerprint():
+    """Hash the path, size and mtime of every file collectstatic would copy,
+    plus the storage configuration that decides how it is written."""
+    digest = hashlib.sha256(repr(settings.STORAGES["staticfiles"]).encode())
+    entries = []
+
+    for finder in finders.get_finders():
+        for path, storage in finder.list(IGNORE_PATTERNS):
+            stat = os.stat(storage.path(path))
+            entries.append((storage.path(path), stat.st_size, stat.st_mtime_ns))
+
+    for entry in sorted(entries):
+        digest.update(repr(entry).encode())
+
+    return digest.hexdigest()
+
+
+def fingerprint_path():
+    return os.path.join(settings.STATIC_ROOT, STATIC_FINGERPRINT)
+
+
+def stored_static_fingerprint():
+    try:
+        with open(fingerprint_path()) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def pending_migrations(database=DEFAULT_DB_ALIAS):
+    executor = MigrationExecutor(connections[database])
+    return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+class Command(BaseCommand):
+    """Django command to prepare static files and the database"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Run collectstatic and migrate even when up to date",
+        )
+
+    def handle(self, *args, **options):
+        fingerprint = static_fingerprint()
+
+        if options["force"] or fingerprint != stored_static_fingerprint():
+            call_command("collectstatic", interactive=False, verbosity=0)
+
+            with open(fingerprint_path(), "w") as f:
+                f.write(fingerprint)
+
+            self.stdout.write("static files collected")
+        else:
+            self.stdout.write("static files up to date, skipped collectstatic")
+
+        if options["force"] or pending_migrations():
+            call_command("migrate", interactive=False)
+        else:
+            self.stdout.write("no pending migrations, skipped migrate")
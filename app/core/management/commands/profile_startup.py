@@ -0,0 +1,145 @@
+"""
+Report where a fresh process spends its start-up time
+"""
+
+import json
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# runs in a fresh interpreter under -X importtime; the report goes to
+# stdout, the import timings to stderr
+PROBE = """
+import json, os, sys, time
+
+start = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", {settings_module!r})
+
+import django
+from django.apps.config import AppConfig
+
+ready = {{}}
+create = AppConfig.create.__func__
+
+
+def timed_create(cls, entry):
+    config = create(cls, entry)
+    config_ready = config.ready
+
+    def timed_ready():
+        began = time.perf_counter()
+        config_ready()
+        ready[config.name] = time.perf_counter() - began
+
+    config.ready = timed_ready
+    return config
+
+
+AppConfig.create = classmethod(timed_create)
+
+imported = time.perf_counter()
+django.setup()
+set_up = time.perf_counter()
+
+if {load_urls!r}:
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+
+done = time.perf_counter()
+json.dump(
+    {{
+        "phases": {{
+            "import django": imported - start,
+            "django.setup()": set_up - imported,
+            "URLconf": done - set_up,
+        }},
+        "ready": ready,
+    }},
+    sys.stdout,
+)
+"""
+
+
+def parse_importtime(lines):
+    """Yield (module, self seconds) from `-X importtime` output."""
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+
+        fields = line[len("import time:"):].split("|")
+
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header row
+
+        yield fields[2].strip(), int(fields[0]) / 1_000_000
+
+
+def group_name(module, groups):
+    """The installed app (or else top-level package) `module` belongs to."""
+    for group in groups:
+        if module == group or module.startswith(group + "."):
+            return group
+
+    return module.partition(".")[0]
+
+
+class Command(BaseCommand):
+    """Django command to profile app start-up"""
+
+    help = "Time imports per app, each app's ready() and the URLconf load."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument(
+            "--no-urls",
+            action="store_true",
+            help="Stop after django.setup(), as management commands do",
+        )
+
+    def handle(self, *args, **options):
+        probe = PROBE.format(
+            settings_module=settings.SETTINGS_MODULE,
+            load_urls=not options["no_urls"],
+        )
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", probe],
+            capture_output=True,
+            text=True,
+        )
+
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+
+        report = json.loads(result.stdout)
+
+        if options["no_urls"]:
+            del report["phases"]["URLconf"]
+
+        # longest first, so django.contrib.admin wins over django
+        groups = sorted(settings.INSTALLED_APPS, key=len, reverse=True)
+        imports = defaultdict(float)
+
+        for module, seconds in parse_importtime(result.stderr.splitlines()):
+            imports[group_name(module, groups)] += seconds
+
+        self.write_section("phases", report["phases"].items())
+        self.write_section(
+            "imports by app", sorted(imports.items(), key=lambda item: -item[1]),
+            top=options["top"],
+        )
+        self.write_section(
+            "ready()", sorted(report["ready"].items(), key=lambda item: -item[1])
+        )
+
+    def write_section(self, title, rows, top=None):
+        rows = list(rows)[:top]
+        width = max(len(name) for name, _ in rows)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+
+        for name, seconds in rows:
+            self.stdout.write(f"  {name:{width}}  {seconds * 1000:8.1f} ms")
@@ -0,0 +1,121 @@
+"""
+Generate the uWSGI ini for this container from WSGI_* environment variables
+"""
+
+import math
+import os
+
+from django.core.management.base import BaseCommand
+
+CGROUP_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+SOMAXCONN = "/proc/sys/net/core/somaxconn"
+
+
+def env_int(name, default):
+    value = os.environ.get(name, "")
+    return int(value) if value.strip() else default
+
+
+def cpu_count():
+    """CPUs this process may use, honouring affinity and a cgroup v2 quota."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+
+    try:
+        with open(CGROUP_CPU_MAX) as f:
+            quota, period = f.read().split()
+    except (OSError, ValueError):
+        return count
+
+    if quota == "max":
+        return count
+
+    return max(1, min(count, math.ceil(int(quota) / int(period))))
+
+
+def listen_backlog(default=1024):
+    """uWSGI refuses to start with a backlog above the kernel's limit."""
+    try:
+        with open(SOMAXCONN) as f:
+            return min(default, int(f.read()))
+    except (OSError, ValueError):
+        return default
+
+
+def build_config(cpus):
+    """Return the [uwsgi] options as (name, value) pairs, in file order."""
+    threads = env_int("WSGI_THREADS", 2)
+    workers = env_int("WSGI_WORKERS", 2 * cpus + 1)
+    lazy_apps = bool(env_int("WSGI_LAZY_APPS", 0))
+    max_requests = env_int("WSGI_MAX_REQUESTS", 5000)
+    reload_on_rss = env_int("WSGI_RELOAD_ON_RSS", 0)
+    # off by default: streamed exports and large NDJSON imports legitimately
+    # hold a worker for minutes
+    harakiri = env_int("WSGI_HARAKIRI", 0)
+    stats = os.environ.get("WSGI_STATS", "127.0.0.1:9191")
+
+    options = [
+        ("module", "app.wsgi:application"),
+        ("socket", os.environ.get("WSGI_SOCKET", ":9000")),
+        ("master", "true"),
+        ("need-app", "true"),
+        ("die-on-term", "true"),
+        ("single-interpreter", "true"),
+        ("vacuum", "true"),
+        ("workers", workers),
+        ("threads", threads),
+        ("enable-threads", "true"),
+        # without lazy-apps Django and the app registry load once in the
+        # master and the workers share those pages copy-on-write
+        ("lazy-apps", "true" if lazy_apps else "false"),
+        ("listen", env_int("WSGI_LISTEN", listen_backlog())),
+        ("buffer-size", env_int("WSGI_BUFFER_SIZE", 8192)),
+    ]
+
+    if threads > 1:
+        options.append(("thunder-lock", "true"))
+
+    if max_requests:
+        # spread the restarts so workers don't all recycle at once
+        options.append(("max-requests", max_requests))
+        options.append(("max-requests-delta", max(1, max_requests // 10)))
+
+    if harakiri:
+        options.append(("harakiri", harakiri))
+
+    if reload_on_rss:
+        options.append(("reload-on-rss", reload_on_rss))
+
+    if stats:
+        options.append(("stats", stats))
+        options.append(("stats-http", "true"))
+
+    return options
+
+
+def render(options):
+    lines = ["[uwsgi]"]
+    lines.extend(f"{name} = {value}" for name, value in options)
+    return "\n".join(lines) + "\n"
+
+
+class Command(BaseCommand):
+    """Django command to write the uWSGI ini"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            help="File to write the ini to, instead of standard output",
+        )
+
+    def handle(self, *args, **options):
+        ini = render(build_config(cpu_count()))
+
+        if options["output"] is None:
+            self.stdout.write(ini, ending="")
+            return
+
+        with open(options["output"], "w") as f:
+            f.write(ini)
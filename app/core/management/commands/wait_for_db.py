@@ -2,26 +2,88 @@
 Wait for DB available
 """
 
+import random
 import time
-from psycopg2 import OperationalError as Psycopg2Error
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+
+from core.management.commands.prepare_app import pending_migrations
+
+# exit codes, besides 0 once the database is ready
+DB_UNAVAILABLE = 1
+MIGRATIONS_PENDING = 3
 
 
 class Command(BaseCommand):
     """Django command to wait for db"""
 
+    help = (
+        "Wait until the database accepts a SELECT 1 and, with --migrations, "
+        "has every migration applied. Exits with 1 or 3 on timeout."
+    )
+
+    # the checks are what we'd be waiting for, and not cheap
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60,
+            help="Give up after this many seconds, 0 tries just once",
+        )
+        parser.add_argument("--initial-delay", type=float, default=0.1)
+        parser.add_argument("--max-delay", type=float, default=5)
+        parser.add_argument(
+            "--migrations",
+            action="store_true",
+            help="Also wait until no migration is pending",
+        )
+
     def handle(self, *args, **options):
         self.stdout.write("waiting for DB...")
 
-        db_up = False
+        deadline = time.monotonic() + options["timeout"]
+        attempt = 0
+
+        while True:
+            error = self.probe(options["database"], options["migrations"])
+
+            if error is None:
+                break
 
-        while db_up is False:
-            try:
-                self.check(databases=["default"])
-                db_up = True
-            except (Psycopg2Error, OperationalError):
-                self.stdout.write("DB unavailable")
-                time.sleep(1)
+            message, returncode = error
+            self.stdout.write(message)
+
+            # jittered, so restarted containers don't retry in lockstep
+            delay = min(options["max_delay"], options["initial_delay"] * 2**attempt)
+            delay = random.uniform(delay / 2, delay)
+            attempt += 1
+
+            if time.monotonic() + delay > deadline:
+                raise CommandError(
+                    f"{message} after {options['timeout']:g}s", returncode=returncode
+                )
+
+            time.sleep(delay)
 
         self.stdout.write(self.style.SUCCESS("DB active!"))
+
+    def probe(self, database, migrations):
+        """Return None when ready, otherwise a message and an exit code."""
+        connection = connections[database]
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+
+            if migrations and pending_migrations(database):
+                return "migrations pending", MIGRATIONS_PENDING
+        except OperationalError:
+            # reconnect from scratch on the next attempt
+            connection.close()
+            return "DB unavailable", DB_UNAVAILABLE
+
+        return None
@@ -0,0 +1,50 @@
+"""
+Responses for access-controlled media, optionally offloaded to the proxy
+"""
+
+import mimetypes
+import posixpath
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import patch_cache_control
+
+# stored names are content hashes, so a name never changes its bytes
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def content_version(name):
+    """A short tag of the content a stored name holds, for URLs that must
+    change whenever the file does."""
+    return posixpath.splitext(posixpath.basename(name))[0][:16]
+
+
+def media_response(storage, name, immutable=True):
+    """Serve the stored file `name`, cacheable forever by the client unless
+    `immutable` is false because the URL does not pin the content.
+
+    With MEDIA_DELIVERY "accel" nginx streams the file named by the
+    X-Accel-Redirect header and "sendfile" does the same via X-Sendfile;
+    "django" streams it from the worker and is meant for development.
+    """
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    delivery = settings.MEDIA_DELIVERY
+
+    if delivery == "accel":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX + quote(name)
+    elif delivery == "sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = storage.path(name)
+    else:
+        response = FileResponse(storage.open(name, "rb"), content_type=content_type)
+
+    if immutable:
+        patch_cache_control(
+            response, private=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+
+    return response
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.15 on 2026-10-18 06:51
+
+from django.db import migrations
+
+
+def merge_duplicates(apps, schema_editor):
+    Recipe = apps.get_model("core", "Recipe")
+
+    for model_name, field in (("Tag", "tags"), ("Ingredient", "ingredients")):
+        model = apps.get_model("core", model_name)
+        through = getattr(Recipe, field).through
+        fk = f"{model_name.lower()}_id"
+        keepers = {}
+
+        for obj in model.objects.order_by("id"):
+            key = (obj.user_id, obj.name)
+
+            if key not in keepers:
+                keepers[key] = obj.id
+                continue
+
+            keeper_id = keepers[key]
+            linked = set(
+                through.objects.filter(**{fk: keeper_id}).values_list(
+                    "recipe_id", flat=True
+                )
+            )
+            through.objects.filter(**{fk: obj.id}, recipe_id__in=linked).delete()
+            through.objects.filter(**{fk: obj.id}).update(**{fk: keeper_id})
+            obj.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_recipe_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
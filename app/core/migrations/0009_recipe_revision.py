@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 07:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_tag_ingredient_unique_user_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='revision',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,137 @@
+# Generated by Django 5.1.15 on 2026-10-18 07:22
+
+import re
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+# must stay in sync with recipe.search.SEARCH_CONFIG and WEIGHTS
+CREATE_TRIGGER = [
+    """
+    CREATE FUNCTION core_recipe_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER core_recipe_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON core_recipe
+    FOR EACH ROW EXECUTE FUNCTION core_recipe_search_vector_update()
+    """,
+    # fill the vectors of existing recipes
+    "UPDATE core_recipe SET title = title",
+]
+
+DROP_TRIGGER = [
+    "DROP TRIGGER core_recipe_search_vector_trigger ON core_recipe",
+    "DROP FUNCTION core_recipe_search_vector_update()",
+]
+
+
+class AddPostgresIndex(migrations.AddIndex):
+    """AddIndex that is a no-op on databases other than PostgreSQL."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class RunPostgresSQL(migrations.RunSQL):
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def build_term_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        return
+
+    Recipe = apps.get_model("core", "Recipe")
+    RecipeSearchTerm = apps.get_model("core", "RecipeSearchTerm")
+    terms = []
+
+    for recipe_id, title, description in Recipe.objects.values_list(
+        "id", "title", "description"
+    ):
+        weights = {}
+
+        for text, weight in ((description, 0.4), (title, 1.0)):
+            for term in re.findall(r"\w+", text.lower()):
+                weights[term[:64]] = weight
+
+        terms.extend(
+            RecipeSearchTerm(recipe_id=recipe_id, term=term, weight=weight)
+            for term, weight in weights.items()
+        )
+
+    RecipeSearchTerm.objects.bulk_create(terms, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_image_jobs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeSearchTerm",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=64)),
+                ("weight", models.FloatField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        AddPostgresIndex(
+            model_name="recipe",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="recipe_search_vector_gin"
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipesearchterm",
+            name="recipe",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="search_terms",
+                to="core.recipe",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="recipesearchterm",
+            constraint=models.UniqueConstraint(
+                fields=("term", "recipe"), name="unique_search_term_recipe"
+            ),
+        ),
+        RunPostgresSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.RunPython(build_term_index, migrations.RunPython.noop),
+    ]
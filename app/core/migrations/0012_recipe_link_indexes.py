@@ -0,0 +1,27 @@
+# Generated by Django 5.1.15 on 2026-10-18 07:41
+
+from django.db import migrations
+
+# The unique (recipe_id, tag_id) constraint of the auto-created join tables
+# serves lookups by recipe; these serve lookups by tag or ingredient, so
+# EXISTS probes on them never touch the table.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_recipe_search"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX core_recipe_tags_tag_recipe_idx "
+            "ON core_recipe_tags (tag_id, recipe_id)",
+            "DROP INDEX core_recipe_tags_tag_recipe_idx",
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX core_recipe_ingredients_ingredient_recipe_idx "
+            "ON core_recipe_ingredients (ingredient_id, recipe_id)",
+            "DROP INDEX core_recipe_ingredients_ingredient_recipe_idx",
+        ),
+    ]
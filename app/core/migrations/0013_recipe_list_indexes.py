@@ -0,0 +1,27 @@
+# Generated by Django 5.1.15 on 2026-10-18 07:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_recipe_link_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["user", "time_minutes"], name="recipe_user_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(fields=["user", "price"], name="recipe_user_price_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(fields=["user", "title"], name="recipe_user_title_idx"),
+        ),
+    ]
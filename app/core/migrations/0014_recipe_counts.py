@@ -0,0 +1,56 @@
+# Generated by Django 5.1.15 on 2026-10-18 07:33
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_recipes(apps, schema_editor):
+    Recipe = apps.get_model("core", "Recipe")
+
+    for model_name, field in (("Tag", "tags"), ("Ingredient", "ingredients")):
+        model = apps.get_model("core", model_name)
+        fk = f"{model_name.lower()}_id"
+        counts = (
+            getattr(Recipe, field)
+            .through.objects.filter(**{fk: OuterRef("pk")})
+            .order_by()
+            .values(fk)
+            .annotate(count=Count("*"))
+            .values("count")
+        )
+        model.objects.update(recipe_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_recipe_list_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ingredient",
+            name="recipe_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="tag",
+            name="recipe_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="ingredient",
+            index=models.Index(
+                fields=["user", "recipe_count", "name"],
+                name="ingredient_user_popularity_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tag",
+            index=models.Index(
+                fields=["user", "recipe_count", "name"], name="tag_user_popularity_idx"
+            ),
+        ),
+        migrations.RunPython(count_recipes, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,8 @@
-import uuid
 import os
 
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -11,10 +12,11 @@ from django.conf import settings
 
 
 def recipe_image_file_path(instance, filename):
+    # ContentAddressedStorage names the file after its bytes, only the
+    # directory and extension are kept
     ext = os.path.splitext(filename)[1]
-    filename = f"{uuid.uuid4()}{ext}"
 
-    return os.path.join("uploads", "recipe", filename)
+    return os.path.join("uploads", "recipe", f"image{ext}")
 
 
 class UserManager(BaseUserManager):
@@ -48,6 +50,21 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
 
 
+class RecipeCountMixin:
+    """Keep saves from writing back a stale `recipe_count`, which only
+    changes through F() updates in recipe.signals."""
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "recipe_count"
+            ]
+
+        super().save(*args, **kwargs)
+
+
 class Recipe(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -61,28 +78,135 @@ class Recipe(models.Model):
     tags = models.ManyToManyField("Tag")
     ingredients = models.ManyToManyField("Ingredient")
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    revision = models.PositiveIntegerField(default=1, editable=False)
+    # weighted title and description, kept current by a database trigger
+    # on PostgreSQL (see migration 0011)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="recipe_search_vector_gin"),
+            # range filters and orderings of the recipe list
+            models.Index(fields=["user", "time_minutes"], name="recipe_user_time_idx"),
+            models.Index(fields=["user", "price"], name="recipe_user_price_idx"),
+            models.Index(fields=["user", "title"], name="recipe_user_title_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.revision += 1
+
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "revision"}
+
+        super().save(*args, **kwargs)
 
-class Tag(models.Model):
+
+class Tag(RecipeCountMixin, models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
     name = models.CharField(max_length=255)
+    # number of linked recipes, kept by recipe.signals
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"], name="unique_tag_user_name"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "recipe_count", "name"],
+                name="tag_user_popularity_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Ingredient(models.Model):
+class Ingredient(RecipeCountMixin, models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
     name = models.CharField(max_length=255)
+    # number of linked recipes, kept by recipe.signals
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"], name="unique_ingredient_user_name"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "recipe_count", "name"],
+                name="ingredient_user_popularity_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class RecipeSearchTerm(models.Model):
+    """Inverted index entry used for recipe search on databases without
+    full-text search support, such as SQLite."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="search_terms",
+    )
+    term = models.CharField(max_length=64)
+    weight = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["term", "recipe"], name="unique_search_term_recipe"
+            ),
+        ]
+
+    def __str__(self):
+        return self.term
+
+
+class ImageJob(models.Model):
+    """Queued resize of a recipe image, claimed by `process_image_jobs`."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="image_jobs",
+    )
+    image_name = models.CharField(max_length=255)
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=PENDING, db_index=True
+    )
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.image_name} ({self.status})"
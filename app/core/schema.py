@@ -0,0 +1,85 @@
+"""
+The OpenAPI schema, generated once and kept under its content hash
+"""
+
+import functools
+import glob
+import hashlib
+import os
+from collections import namedtuple
+
+from django.conf import settings
+
+# format: (file extension, content type)
+FORMATS = {
+    "yaml": ("yaml", "application/vnd.oai.openapi"),
+    "json": ("json", "application/vnd.oai.openapi+json"),
+}
+
+Schema = namedtuple("Schema", ["digest", "documents"])
+
+
+def generate():
+    """Build the schema from the current views, rendered in every format."""
+    # drf_spectacular is only needed here, not to serve the result
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    data = generator.get_schema(request=None, public=True)
+    documents = {
+        "yaml": OpenApiYamlRenderer().render(data),
+        "json": OpenApiJsonRenderer().render(data),
+    }
+    digest = hashlib.sha256(documents["json"]).hexdigest()[:20]
+
+    return Schema(digest, documents)
+
+
+def file_name(digest, schema_format):
+    return f"openapi.{digest}.{FORMATS[schema_format][0]}"
+
+
+def write(schema, root):
+    os.makedirs(root, exist_ok=True)
+
+    for old in glob.glob(os.path.join(root, "openapi.*")):
+        os.remove(old)
+
+    for schema_format, document in schema.documents.items():
+        path = os.path.join(root, file_name(schema.digest, schema_format))
+
+        with open(path, "wb") as f:
+            f.write(document)
+
+
+def read(root):
+    """Load the schema written by `write`, or None when there is none."""
+    names = glob.glob(os.path.join(root, file_name("*", "json")))
+
+    if len(names) != 1:
+        return None
+
+    digest = os.path.basename(names[0]).split(".")[1]
+    documents = {}
+
+    for schema_format in FORMATS:
+        try:
+            with open(os.path.join(root, file_name(digest, schema_format)), "rb") as f:
+                documents[schema_format] = f.read()
+        except OSError:
+            return None
+
+    return Schema(digest, documents)
+
+
+@functools.cache
+def get_schema():
+    """The schema built by `build_schema` under API_SCHEMA_ROOT, otherwise
+    one generated on first use, kept for the life of the process."""
+    schema = None
+
+    if settings.API_SCHEMA_ROOT:
+        schema = read(settings.API_SCHEMA_ROOT)
+
+    return schema or generate()
@@ -0,0 +1,23 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.authentication import revoke_token, revoke_user_tokens
+
+
+@receiver(post_delete, sender=Token)
+def drop_deleted_token(sender, instance, **kwargs):
+    # after commit, or a lookup racing the delete could cache the token
+    # again under the new version
+    transaction.on_commit(partial(revoke_token, instance.key))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def drop_saved_user_tokens(sender, instance, created, **kwargs):
+    # covers deactivation as well as profile changes the cache would hide
+    if not created:
+        transaction.on_commit(partial(revoke_user_tokens, instance.pk))
@@ -0,0 +1,104 @@
+"""
+Storage backends for uploaded media and collected static files
+"""
+
+import gzip
+import hashlib
+import os
+import posixpath
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".map", ".svg", ".json", ".txt", ".html")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Filesystem storage naming every file after the SHA-256 of its bytes.
+
+    Only the directory and extension of the requested name are kept.
+    Saving bytes that are already stored returns the existing name, so a
+    photo uploaded to many recipes is kept once, and a name never changes
+    content. Files no longer referenced are removed by `gc_media`.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        name = self.content_name(name, content)
+
+        if not self.exists(name):
+            try:
+                return super().save(name, content, max_length)
+            except FileExistsError:
+                # a concurrent upload of the same bytes stored it first
+                if not self.exists(name):
+                    raise
+
+        # refresh the mtime so gc_media's grace period covers the reuse
+        os.utime(self.path(name))
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        """Refuse to suffix a taken name: it already holds these bytes."""
+        if self.exists(name):
+            raise FileExistsError(name)
+
+        return name
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        directory, filename = posixpath.split(name)
+        ext = os.path.splitext(filename)[1].lower()
+        hexdigest = digest.hexdigest()
+
+        return posixpath.join(directory, hexdigest[:2], hexdigest + ext)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also writes precompressed siblings of every
+    hashed text asset at collectstatic time.
+
+    `.gz` files are always written, `.br` files when the optional `brotli`
+    package is installed, so nginx can serve them without compressing on
+    each request.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+
+        if dry_run:
+            return
+
+        for name in set(self.hashed_files.values()):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self._write_compressed(name)
+
+    def _write_compressed(self, name):
+        with self.open(name) as source:
+            data = source.read()
+
+        encoded = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+
+        if brotli is not None:
+            encoded[".br"] = brotli.compress(data)
+
+        for suffix, compressed in encoded.items():
+            if len(compressed) < len(data):
+                with open(self.path(name + suffix), "wb") as target:
+                    target.write(compressed)
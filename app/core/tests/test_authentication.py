@@ -0,0 +1,174 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from django.core.cache import cache
+
+from core import authentication
+from core.authentication import TTLCache, token_cache
+
+
+ME_URL = reverse("user:me")
+
+
+class TTLCacheTests(TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    @patch("core.authentication.time.monotonic")
+    def test_entries_expire(self, mock_monotonic):
+        cache = TTLCache(max_size=2, ttl=10)
+        mock_monotonic.return_value = 100
+        cache.set("a", 1)
+
+        mock_monotonic.return_value = 105
+        self.assertEqual(cache.get("a"), 1)
+
+        mock_monotonic.return_value = 111
+        self.assertIsNone(cache.get("a"))
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@email.com", password="some1223", name="name"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_token_lookup_cached(self):
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data["email"], self.user.email)
+
+    def test_deleted_token_rejected(self):
+        self.client.get(ME_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_not_served_stale(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(ME_URL, {"name": "new name"})
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data["name"], "new name")
+
+    @override_settings(TOKEN_AUTH_SHARED_CACHE="default")
+    def test_shared_cache(self):
+        self.client.get(ME_URL)
+        token_cache.clear()
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_seen_by_other_processes(self):
+        self.client.get(ME_URL)
+
+        # what another process's signal handler leaves behind: the shared
+        # version moves on, this process's entry stays
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        authentication.cache.bump_version(
+            authentication._revocation_scope(self.token.key)
+        )
+
+        self.assertIsNotNone(token_cache.get(self.token.key))
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_during_lookup_not_cached(self):
+        lookup = TokenAuthentication.authenticate_credentials
+
+        def deactivated_meanwhile(auth, key):
+            result = lookup(auth, key)
+            get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+            authentication.revoke_user_tokens(self.user.pk)
+
+            return result
+
+        with patch.object(
+            TokenAuthentication, "authenticate_credentials", deactivated_meanwhile
+        ):
+            self.client.get(ME_URL)
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bumps_wait_for_commit(self):
+        self.client.get(ME_URL)
+        key = self.token.key
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.token.delete()
+
+        self.assertIsNotNone(token_cache.get(key))
+
+        for callback in callbacks:
+            callback()
+
+        self.assertIsNone(token_cache.get(key))
+
+    @override_settings(TOKEN_AUTH_SHARED_CACHE="default")
+    def test_shared_cache_holds_no_secrets(self):
+        self.client.get(ME_URL)
+
+        entry = cache.get(authentication._shared_key(self.token.key))
+
+        self.assertNotIn("password", entry["fields"])
+        self.assertNotIn(self.user.password, entry["values"])
+        self.assertNotIn(self.token.key, entry["values"])
+
+    @override_settings(TOKEN_AUTH_SHARED_CACHE="default")
+    def test_update_through_shared_entry_keeps_password(self):
+        self.client.get(ME_URL)
+        token_cache.clear()
+
+        res = self.client.patch(ME_URL, {"name": "new name"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, "new name")
+        self.assertTrue(self.user.check_password("some1223"))
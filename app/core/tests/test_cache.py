@@ -0,0 +1,76 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache as django_cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import cache
+
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CacheHelperTests(TestCase):
+    def setUp(self):
+        django_cache.clear()
+        cache.reset_stats()
+
+    def test_bump_version_changes_keys(self):
+        key = cache.make_key("recipes", "user:1", "a")
+
+        cache.bump_version("user:1")
+
+        self.assertNotEqual(key, cache.make_key("recipes", "user:1", "a"))
+        self.assertEqual(
+            cache.make_key("recipes", "user:2", "a"),
+            cache.make_key("recipes", "user:2", "a"),
+        )
+
+    @patch("core.cache.time.time_ns")
+    def test_evicted_version_does_not_reuse_old_keys(self, mock_time_ns):
+        mock_time_ns.return_value = 1000
+        cache.bump_version("user:1")
+        old_key = cache.make_key("recipes", "user:1")
+
+        django_cache.delete("version:user:1")
+        mock_time_ns.return_value = 2000
+        cache.bump_version("user:1")
+
+        self.assertNotEqual(old_key, cache.make_key("recipes", "user:1"))
+
+    def test_get_or_set_counts_hits_and_misses(self):
+        calls = []
+
+        def produce():
+            calls.append(1)
+            return "value"
+
+        for _ in range(3):
+            value = cache.get_or_set("recipes", "k", produce)
+
+        self.assertEqual(value, "value")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats(), {"recipes": {"hits": 2, "misses": 1}})
+
+
+class CacheStatsApiTests(TestCase):
+    def test_admin_only(self):
+        client = APIClient()
+        user = get_user_model().objects.create_user("u@example.com", "pass123")
+        client.force_authenticate(user)
+
+        res = client.get(reverse("cache-stats"))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        user.is_staff = True
+        user.save()
+        res = client.get(reverse("cache-stats"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("namespaces", res.data)
@@ -1,29 +1,81 @@
+from io import StringIO
 from unittest.mock import patch
-from psycopg2 import OperationalError as Psycopg2Error
 
 from django.core.management import call_command
-from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
 
+from core.management.commands.wait_for_db import DB_UNAVAILABLE, MIGRATIONS_PENDING
 
-@patch("core.management.commands.wait_for_db.Command.check")
+UNAVAILABLE = ("DB unavailable", DB_UNAVAILABLE)
+
+
+@patch("core.management.commands.wait_for_db.Command.probe")
 class CommandTests(SimpleTestCase):
 
-    def test_wait_for_db_ready(self, patched_check):
-        patched_check.return_value = True
+    def test_wait_for_db_ready(self, patched_probe):
+        patched_probe.return_value = None
+
+        call_command("wait_for_db", stdout=StringIO())
+
+        patched_probe.assert_called_once_with("default", False)
+
+    @patch("time.sleep")
+    def test_wait_for_db_delay(self, patched_sleep, patched_probe):
+        patched_probe.side_effect = [UNAVAILABLE] * 5 + [None]
+
+        call_command("wait_for_db", stdout=StringIO())
+
+        self.assertEqual(patched_probe.call_count, 6)
+
+        delays = [call.args[0] for call in patched_sleep.call_args_list]
+        for attempt, delay in enumerate(delays):
+            self.assertGreaterEqual(delay, 0.1 * 2**attempt / 2)
+            self.assertLessEqual(delay, 0.1 * 2**attempt)
+
+    @patch("time.sleep")
+    def test_wait_for_db_delay_capped(self, patched_sleep, patched_probe):
+        patched_probe.side_effect = [UNAVAILABLE] * 10 + [None]
 
-        call_command("wait_for_db")
+        call_command("wait_for_db", max_delay=1, stdout=StringIO())
 
-        patched_check.assert_called_once_with(databases=["default"])
+        self.assertLessEqual(max(c.args[0] for c in patched_sleep.call_args_list), 1)
 
     @patch("time.sleep")
-    def test_wait_for_db_delay(self, patched_sleep, patched_check):
-        patched_check.side_effect = (
-            [Psycopg2Error] * 2 + [OperationalError] * 3 + [True]
-        )
+    def test_wait_for_db_timeout(self, patched_sleep, patched_probe):
+        patched_probe.return_value = UNAVAILABLE
+
+        with patch("time.monotonic", side_effect=[0, 0, 0.5, 1.5]):
+            with self.assertRaises(CommandError) as cm:
+                call_command("wait_for_db", timeout=1, stdout=StringIO())
+
+        self.assertEqual(cm.exception.returncode, DB_UNAVAILABLE)
+        self.assertEqual(patched_probe.call_count, 3)
+
+    def test_wait_for_db_once(self, patched_probe):
+        patched_probe.return_value = ("migrations pending", MIGRATIONS_PENDING)
+
+        with self.assertRaises(CommandError) as cm:
+            call_command("wait_for_db", timeout=0, migrations=True, stdout=StringIO())
+
+        self.assertEqual(cm.exception.returncode, MIGRATIONS_PENDING)
+        patched_probe.assert_called_once_with("default", True)
+
+
+class ProbeTests(TestCase):
+
+    def test_wait_for_db_against_database(self):
+        out = StringIO()
+
+        call_command("wait_for_db", timeout=0, migrations=True, stdout=out)
+
+        self.assertIn("DB active!", out.getvalue())
 
-        call_command("wait_for_db")
+    @patch("core.management.commands.wait_for_db.pending_migrations")
+    def test_pending_migrations(self, patched_pending):
+        patched_pending.return_value = [object()]
 
-        self.assertEqual(patched_check.call_count, 6)
+        with self.assertRaises(CommandError) as cm:
+            call_command("wait_for_db", timeout=0, migrations=True, stdout=StringIO())
 
-        patched_check.assert_called_with(databases=["default"])
+        self.assertEqual(cm.exception.returncode, MIGRATIONS_PENDING)
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+class DatabaseStatsApiTests(TestCase):
+    def test_reports_connection_settings(self):
+        client = APIClient()
+        user = get_user_model().objects.create_user("u@example.com", "pass123")
+        client.force_authenticate(user)
+
+        res = client.get(reverse("db-stats"))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        user.is_staff = True
+        user.save()
+        res = client.get(reverse("db-stats"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        default = res.data["default"]
+        self.assertEqual(
+            default["conn_max_age"], connection.settings_dict["CONN_MAX_AGE"]
+        )
+        self.assertTrue(default["connected"])
+        self.assertIsNone(default["pool"])
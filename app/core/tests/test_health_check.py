@@ -1,5 +1,4 @@
 from unittest.mock import patch
-from psycopg2 import OperationalError as Psycopg2Error
 
 from django.core.management import call_command
 from django.db.utils import OperationalError
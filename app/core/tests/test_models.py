@@ -2,7 +2,6 @@ from django.test import TestCase
 from django.contrib.auth import get_user_model
 from decimal import Decimal
 from core import models
-from unittest.mock import patch
 
 
 def create_user(email="esuer@terst.com", password="some123"):
@@ -53,6 +52,21 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(recipe), recipe.title)
 
+    def test_recipe_revision_increments_on_save(self):
+        recipe = models.Recipe.objects.create(
+            user=create_user(),
+            title="Some title",
+            time_minutes=5,
+            price=Decimal("4.50"),
+        )
+        self.assertEqual(recipe.revision, 1)
+
+        recipe.title = "New title"
+        recipe.save(update_fields=["title"])
+        recipe.refresh_from_db()
+
+        self.assertEqual(recipe.revision, 2)
+
     def test_create_tag(self):
         user = create_user()
 
@@ -70,11 +84,7 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(ingredient), ingredient.name)
 
-    @patch("core.models.uuid.uuid4")
-    def test_recipe_file_name_uuid(self, mock_uuid):
-        uuid = "test-uuid"
-        mock_uuid.return_value = uuid
-
+    def test_recipe_file_name_keeps_extension(self):
         file_path = models.recipe_image_file_path(None, "example.jpg")
 
-        self.assertEqual(file_path, f"uploads/recipe/{uuid}.jpg")
+        self.assertEqual(file_path, "uploads/recipe/image.jpg")
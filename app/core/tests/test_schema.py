@@ -0,0 +1,87 @@
+import tempfile
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import schema
+
+SCHEMA_URL = reverse("api-schema")
+DOCS_URL = reverse("api-docs")
+
+SCHEMA = schema.Schema(
+    "abc123", {"yaml": b"openapi: 3.0.3\n", "json": b'{"openapi":"3.0.3"}'}
+)
+
+
+def file_url(digest, fmt):
+    return reverse("api-schema-file", args=[digest, fmt])
+
+
+@patch("core.schema.get_schema", return_value=SCHEMA)
+class SchemaViewTests(SimpleTestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_yaml_by_default(self, patched_get_schema):
+        res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, SCHEMA.documents["yaml"])
+        self.assertEqual(res["Content-Type"], "application/vnd.oai.openapi")
+        self.assertEqual(res["ETag"], '"abc123.yaml"')
+        self.assertIn("no-cache", res["Cache-Control"])
+
+    def test_json_by_format_or_accept(self, patched_get_schema):
+        by_format = self.client.get(SCHEMA_URL, {"format": "json"})
+        by_accept = self.client.get(SCHEMA_URL, HTTP_ACCEPT="application/json")
+
+        for res in (by_format, by_accept):
+            self.assertEqual(res.content, SCHEMA.documents["json"])
+            self.assertEqual(res["ETag"], '"abc123.json"')
+
+    def test_revalidation(self, patched_get_schema):
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH='"abc123.yaml"')
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_hashed_url_is_immutable(self, patched_get_schema):
+        res = self.client.get(file_url("abc123", "json"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, SCHEMA.documents["json"])
+        self.assertIn("immutable", res["Cache-Control"])
+
+    def test_old_hash_redirects(self, patched_get_schema):
+        res = self.client.get(file_url("0ff", "yaml"))
+
+        self.assertEqual(res.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(res["Location"], file_url("abc123", "yaml"))
+
+    @patch("core.docs.get_schema", return_value=SCHEMA)
+    def test_docs_use_hashed_url(self, patched_docs_schema, patched_get_schema):
+        res = self.client.get(DOCS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertContains(res, file_url("abc123", "json"))
+
+        res = self.client.get(DOCS_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class BuildSchemaTests(SimpleTestCase):
+    def test_written_schema_is_served(self):
+        with tempfile.TemporaryDirectory() as root:
+            built = schema.generate()
+            schema.write(built, root)
+
+            with override_settings(API_SCHEMA_ROOT=root):
+                schema.get_schema.cache_clear()
+                self.addCleanup(schema.get_schema.cache_clear)
+
+                self.assertEqual(schema.get_schema(), built)
+
+        self.assertIn(b"/api/recipe/recipes/", built.documents["yaml"])
@@ -0,0 +1,81 @@
+import os.path
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.management.commands import prepare_app, profile_startup
+
+
+@patch("core.management.commands.prepare_app.call_command")
+class PrepareAppTests(TestCase):
+    def setUp(self):
+        self.static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.static_root.cleanup)
+
+        settings_override = override_settings(STATIC_ROOT=self.static_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def commands(self, patched_call_command):
+        return [call.args[0] for call in patched_call_command.call_args_list]
+
+    def test_collects_static_once(self, patched_call_command):
+        call_command("prepare_app", stdout=StringIO())
+        call_command("prepare_app", stdout=StringIO())
+
+        self.assertEqual(self.commands(patched_call_command), ["collectstatic"])
+        self.assertTrue(os.path.exists(prepare_app.fingerprint_path()))
+
+    def test_changed_static_files_collected_again(self, patched_call_command):
+        call_command("prepare_app", stdout=StringIO())
+
+        with patch.object(prepare_app, "static_fingerprint", return_value="new"):
+            call_command("prepare_app", stdout=StringIO())
+
+        self.assertEqual(
+            self.commands(patched_call_command), ["collectstatic", "collectstatic"]
+        )
+
+    def test_pending_migrations_applied(self, patched_call_command):
+        with patch.object(prepare_app, "pending_migrations", return_value=[1]):
+            call_command("prepare_app", stdout=StringIO())
+
+        self.assertEqual(
+            self.commands(patched_call_command), ["collectstatic", "migrate"]
+        )
+
+    def test_force(self, patched_call_command):
+        call_command("prepare_app", stdout=StringIO())
+        call_command("prepare_app", force=True, stdout=StringIO())
+
+        self.assertEqual(
+            self.commands(patched_call_command),
+            ["collectstatic", "collectstatic", "migrate"],
+        )
+
+
+class ProfileStartupTests(TestCase):
+    def test_parse_importtime(self):
+        lines = [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |   rest_framework.status",
+            "import time:      2000 |       2120 | rest_framework",
+        ]
+
+        self.assertEqual(
+            list(profile_startup.parse_importtime(lines)),
+            [("rest_framework.status", 0.00012), ("rest_framework", 0.002)],
+        )
+
+    def test_group_name(self):
+        groups = ["django.contrib.admin", "recipe"]
+
+        self.assertEqual(
+            profile_startup.group_name("django.contrib.admin.sites", groups),
+            "django.contrib.admin",
+        )
+        self.assertEqual(profile_startup.group_name("recipe", groups), "recipe")
+        self.assertEqual(profile_startup.group_name("django.db", groups), "django")
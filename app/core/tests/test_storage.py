@@ -0,0 +1,123 @@
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import Recipe
+from core.storage import CompressedManifestStaticFilesStorage, ContentAddressedStorage
+
+
+class StorageTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.storage = Recipe._meta.get_field("image").storage
+
+
+class ContentAddressedStorageTests(StorageTestCase):
+    def test_identical_content_stored_once(self):
+        first = self.storage.save("uploads/recipe/a.JPG", ContentFile(b"same"))
+        second = self.storage.save("uploads/recipe/b.jpg", ContentFile(b"same"))
+        other = self.storage.save("uploads/recipe/c.jpg", ContentFile(b"other"))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertTrue(first.startswith("uploads/recipe/"))
+        self.assertTrue(first.endswith(".jpg"))
+        self.assertEqual(len(os.listdir(os.path.dirname(self.storage.path(first)))), 1)
+
+    def test_concurrent_identical_upload_keeps_name(self):
+        name = self.storage.save("uploads/recipe/a.jpg", ContentFile(b"same"))
+
+        # the other upload stores the bytes between the check and the write
+        raced_exists = [False, True, True]
+        with patch.object(ContentAddressedStorage, "exists", side_effect=raced_exists):
+            raced = self.storage.save("uploads/recipe/b.jpg", ContentFile(b"same"))
+
+        self.assertEqual(raced, name)
+        self.assertEqual(len(os.listdir(os.path.dirname(self.storage.path(name)))), 1)
+
+    def test_default_storage_is_content_addressed(self):
+        self.assertIsInstance(storages["default"], ContentAddressedStorage)
+
+
+class GarbageCollectMediaTests(StorageTestCase):
+    def _age(self, name, seconds=7200):
+        past = time.time() - seconds
+        os.utime(self.storage.path(name), (past, past))
+
+    def _gc(self, *args):
+        out = io.StringIO()
+        call_command("gc_media", *args, stdout=out)
+
+        return out.getvalue()
+
+    def test_removes_only_old_orphans(self):
+        user = get_user_model().objects.create_user("u@example.com", "pass123")
+        kept = self.storage.save("uploads/recipe/a.jpg", ContentFile(b"kept"))
+        variant = self.storage.save("uploads/recipe/v.jpg", ContentFile(b"variant"))
+        orphan = self.storage.save("uploads/recipe/b.jpg", ContentFile(b"orphan"))
+        fresh = self.storage.save("uploads/recipe/c.jpg", ContentFile(b"fresh"))
+        Recipe.objects.create(
+            user=user,
+            title="t",
+            time_minutes=1,
+            price=Decimal("1.00"),
+            image=kept,
+            image_variants={"thumbnail": variant},
+        )
+        for name in (kept, variant, orphan):
+            self._age(name)
+
+        self.assertIn("would remove 1 files", self._gc("--dry-run"))
+        self.assertTrue(self.storage.exists(orphan))
+
+        self._gc()
+
+        self.assertTrue(self.storage.exists(kept))
+        self.assertTrue(self.storage.exists(variant))
+        self.assertTrue(self.storage.exists(fresh))
+        self.assertFalse(self.storage.exists(orphan))
+
+    def test_reused_blob_survives_grace_period(self):
+        name = self.storage.save("uploads/recipe/a.jpg", ContentFile(b"blob"))
+        self._age(name)
+
+        self.storage.save("uploads/recipe/b.jpg", ContentFile(b"blob"))
+        self._gc()
+
+        self.assertTrue(self.storage.exists(name))
+
+
+class CompressedManifestStaticFilesStorageTests(TestCase):
+    def test_collectstatic_writes_gzip_siblings(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root, ignore_errors=True)
+        backend = "core.storage.CompressedManifestStaticFilesStorage"
+
+        with override_settings(
+            STATIC_ROOT=static_root,
+            STORAGES={"staticfiles": {"BACKEND": backend}},
+        ):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            storage = storages["staticfiles"]
+            self.assertIsInstance(storage, CompressedManifestStaticFilesStorage)
+            name = storage.stored_name("admin/css/base.css")
+
+        path = os.path.join(static_root, name)
+        with open(path, "rb") as original, gzip.open(path + ".gz") as compressed:
+            self.assertEqual(compressed.read(), original.read())
@@ -0,0 +1,76 @@
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import mock_open, patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from core.management.commands import uwsgi_config
+
+
+def options_of(env=None, cpus=2):
+    with patch.dict(os.environ, env or {}):
+        return dict(uwsgi_config.build_config(cpus))
+
+
+class UwsgiConfigTests(SimpleTestCase):
+    def test_workers_sized_from_cpus(self):
+        options = options_of(cpus=4)
+
+        self.assertEqual(options["workers"], 9)
+        self.assertEqual(options["threads"], 2)
+        self.assertEqual(options["lazy-apps"], "false")
+        self.assertNotIn("harakiri", options)
+
+    def test_env_overrides(self):
+        options = options_of(
+            {
+                "WSGI_WORKERS": "3",
+                "WSGI_THREADS": "1",
+                "WSGI_LAZY_APPS": "1",
+                "WSGI_RELOAD_ON_RSS": "256",
+                "WSGI_LISTEN": "64",
+                "WSGI_HARAKIRI": "600",
+            }
+        )
+
+        self.assertEqual(options["harakiri"], 600)
+        self.assertEqual(options["workers"], 3)
+        self.assertEqual(options["threads"], 1)
+        self.assertNotIn("thunder-lock", options)
+        self.assertEqual(options["lazy-apps"], "true")
+        self.assertEqual(options["reload-on-rss"], 256)
+        self.assertEqual(options["listen"], 64)
+
+    def test_recycling_and_stats_can_be_disabled(self):
+        options = options_of({"WSGI_MAX_REQUESTS": "0", "WSGI_STATS": ""})
+
+        self.assertNotIn("max-requests", options)
+        self.assertNotIn("stats", options)
+
+    def test_cpu_count_honours_cgroup_quota(self):
+        with patch("os.sched_getaffinity", return_value=set(range(8))):
+            with patch("builtins.open", mock_open(read_data="150000 100000\n")):
+                self.assertEqual(uwsgi_config.cpu_count(), 2)
+
+            with patch("builtins.open", mock_open(read_data="max 100000\n")):
+                self.assertEqual(uwsgi_config.cpu_count(), 8)
+
+    def test_command_writes_ini(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "uwsgi.ini")
+
+            call_command("uwsgi_config", output=path, stdout=StringIO())
+
+            with open(path) as f:
+                ini = f.read()
+
+        self.assertTrue(ini.startswith("[uwsgi]\n"))
+        self.assertIn("module = app.wsgi:application\n", ini)
+
+    def test_empty_listen_follows_somaxconn(self):
+        with patch.object(uwsgi_config, "listen_backlog", return_value=128):
+            options = options_of({"WSGI_LISTEN": ""})
+
+        self.assertEqual(options["listen"], 128)
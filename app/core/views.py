@@ -5,10 +5,145 @@
 #     OpenApiTypes,
 # )
 
-from rest_framework.decorators import action, api_view
+import functools
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseRedirect
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_safe
+from rest_framework import permissions
+from rest_framework.decorators import (
+    action,
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
 from rest_framework.response import Response
 
+from core import cache
+from core import schema as api_schema
+from core.authentication import CachedTokenAuthentication
+
+
+def lazy_view(dotted_path, **initkwargs):
+    """URLconf entry for the view at `dotted_path`, imported on its first
+    request instead of when the URLconf loads."""
+
+    @functools.cache
+    def load():
+        view = import_string(dotted_path)
+        return view.as_view(**initkwargs) if hasattr(view, "as_view") else view
+
+    @csrf_exempt
+    def view(request, *args, **kwargs):
+        return load()(request, *args, **kwargs)
+
+    return view
+
+
+def schema_format(request):
+    """`?format=` first, then the first JSON or YAML type in Accept."""
+    if request.GET.get("format") in api_schema.FORMATS:
+        return request.GET["format"]
+
+    for media_type in request.accepted_types:
+        if media_type.sub_type.endswith("json"):
+            return "json"
+        if media_type.sub_type.endswith(("yaml", "openapi")):
+            return "yaml"
+
+    return "yaml"
+
+
+def schema_response(request, schema, fmt):
+    etag = quote_etag(f"{schema.digest}.{fmt}")
+    response = get_conditional_response(request, etag=etag)
+
+    if response is None:
+        response = HttpResponse(
+            schema.documents[fmt], content_type=api_schema.FORMATS[fmt][1]
+        )
+        response["Content-Disposition"] = (
+            f'inline; filename="{api_schema.file_name(schema.digest, fmt)}"'
+        )
+
+    response["ETag"] = etag
+
+    return response
+
+
+@require_safe
+def schema(request):
+    """The OpenAPI schema, revalidated against its content hash."""
+    fmt = schema_format(request)
+    response = schema_response(request, api_schema.get_schema(), fmt)
+    response["Vary"] = "Accept"
+    patch_cache_control(response, public=True, no_cache=True)
+
+    return response
+
+
+@require_safe
+def schema_file(request, digest, fmt):
+    """The OpenAPI schema at its content-hashed URL, cached for good.
+
+    Older hashes redirect to the current one.
+    """
+    current = api_schema.get_schema()
+
+    if digest != current.digest:
+        response = HttpResponseRedirect(
+            reverse("api-schema-file", args=[current.digest, fmt])
+        )
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    response = schema_response(request, current, fmt)
+    patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+
+    return response
+
 
 @api_view(["GET"])
 def health_check(request):
     return Response({"health": True})
+
+
+@api_view(["GET"])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([permissions.IsAdminUser])
+def cache_stats(request):
+    return Response(
+        {
+            "backend": settings.CACHES["default"]["BACKEND"],
+            "namespaces": cache.stats(),
+        }
+    )
+
+
+@api_view(["GET"])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([permissions.IsAdminUser])
+def db_stats(request):
+    """Connection reuse settings and, when pooling, this process's pool
+    statistics per database alias."""
+    result = {}
+
+    for alias in connections:
+        connection = connections[alias]
+        pool = getattr(connection, "pool", None)
+
+        result[alias] = {
+            "vendor": connection.vendor,
+            "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+            "health_checks": connection.settings_dict["CONN_HEALTH_CHECKS"],
+            "connected": connection.connection is not None,
+            "pool": pool.get_stats() if pool is not None else None,
+        }
+
+    return Response(result)
@@ -0,0 +1,184 @@
+"""
+Native async reads of the recipe API, routed by `app.urls_async` under ASGI
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+
+from core import cache
+from core.authentication import CachedTokenAuthentication
+from core.models import Ingredient, Recipe, Tag
+from recipe.caching import (
+    list_cache_key,
+    not_modified,
+    recipe_etag,
+    tag_list_response,
+)
+from recipe.filters import filter_recipe_attrs, filter_recipes, validated
+from recipe.serializers import (
+    IngredientCountSerializer,
+    IngredientSerializer,
+    RecipeAttrFilterSerializer,
+    RecipeDetailSerializer,
+    RecipeSerializer,
+    TagCountSerializer,
+    TagSerializer,
+)
+from recipe.views import IngredientViewSet, RecipeViewSet, TagViewSet
+
+CHUNK_SIZE = 500
+
+# pagination stays on the DRF view, whose paginator is sync only
+PAGINATION_PARAMS = {"cursor", "page_size"}
+
+
+async def authenticate(request):
+    """Token authentication only, like the DRF viewsets."""
+    result = await CachedTokenAuthentication().aauthenticate(request)
+
+    if result is None:
+        raise exceptions.NotAuthenticated()
+
+    return result[0]
+
+
+def _error_response(exc):
+    detail = exc.detail
+
+    if not isinstance(detail, (list, dict)):
+        detail = {"detail": detail}
+
+    response = JsonResponse(detail, status=exc.status_code, safe=False)
+
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response["WWW-Authenticate"] = CachedTokenAuthentication.keyword
+
+    return response
+
+
+def read_view(read, sync_view):
+    """Serve GET and HEAD with the coroutine `read`, anything else with
+    the regular DRF `sync_view`."""
+    sync_view = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return await sync_view(request, *args, **kwargs)
+
+        try:
+            request.user = await authenticate(request)
+
+            if PAGINATION_PARAMS & request.GET.keys():
+                return await sync_view(request, *args, **kwargs)
+
+            return await read(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return _error_response(exc)
+
+    return csrf_exempt(view)
+
+
+def cached_list(basename, read):
+    """Serve the coroutine `read` through the same per-user cache, ETag and
+    304 handling as `CachedListMixin`, sharing its entries."""
+
+    async def view(request):
+        # the cache calls are blocking, keep them off the ORM's thread
+        namespace, key, etag = await sync_to_async(
+            list_cache_key, thread_sensitive=False
+        )(basename, request.user.pk, request.get_host(), request.GET)
+
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        async def produce():
+            return {"data": await read(request)}
+
+        entry = await cache.aget_or_set(namespace, key, produce)
+
+        return tag_list_response(JsonResponse(entry["data"], safe=False), etag)
+
+    return view
+
+
+async def _recipe_list(request):
+    queryset = filter_recipes(Recipe.objects.all(), request.user, request.GET)
+
+    return [
+        RecipeSerializer(recipe).data
+        async for recipe in queryset.aiterator(chunk_size=CHUNK_SIZE)
+    ]
+
+
+async def _recipe_detail(request, pk):
+    recipes = Recipe.objects.filter(user=request.user)
+
+    # answer a revalidation from the revision alone
+    if request.headers.get("If-None-Match"):
+        revisions = recipes.filter(pk=pk).values_list("revision", flat=True)
+        revision = await revisions.afirst()
+        etag = recipe_etag(pk, revision)
+
+        if revision is not None:
+            response = get_conditional_response(request, etag=etag)
+
+            if response is not None:
+                response["ETag"] = etag
+                return response
+
+    try:
+        recipe = await recipes.prefetch_related("tags", "ingredients").aget(pk=pk)
+    except Recipe.DoesNotExist:
+        raise exceptions.NotFound()
+
+    data = RecipeDetailSerializer(recipe, context={"request": request}).data
+    response = JsonResponse(data)
+    response["ETag"] = recipe_etag(recipe.id, recipe.revision)
+
+    return response
+
+
+def _attr_list(model, serializer_class, count_serializer_class):
+    async def read(request):
+        params = validated(RecipeAttrFilterSerializer, request.GET)
+        queryset = filter_recipe_attrs(model.objects.all(), request.user, params)
+        serializer = serializer_class
+
+        if params["with_counts"]:
+            serializer = count_serializer_class
+
+        return [serializer(item).data async for item in queryset]
+
+    return read
+
+
+recipe_list = read_view(
+    cached_list("recipe", _recipe_list),
+    RecipeViewSet.as_view({"get": "list", "post": "create"}),
+)
+recipe_detail = read_view(
+    _recipe_detail,
+    RecipeViewSet.as_view(
+        {
+            "get": "retrieve",
+            "put": "update",
+            "patch": "partial_update",
+            "delete": "destroy",
+        }
+    ),
+)
+tag_list = read_view(
+    cached_list("tag", _attr_list(Tag, TagSerializer, TagCountSerializer)),
+    TagViewSet.as_view({"get": "list"}),
+)
+ingredient_list = read_view(
+    cached_list(
+        "ingredient",
+        _attr_list(Ingredient, IngredientSerializer, IngredientCountSerializer),
+    ),
+    IngredientViewSet.as_view({"get": "list"}),
+)
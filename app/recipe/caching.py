@@ -0,0 +1,93 @@
+"""
+Per-user response caching for the recipe app's list endpoints
+"""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from rest_framework import exceptions, status
+from rest_framework.response import Response
+
+from core import cache
+
+
+def user_scope(user_id):
+    return f"user:{user_id}"
+
+
+def invalidate_user(user_id):
+    cache.bump_version(user_scope(user_id))
+
+
+class PreconditionFailed(exceptions.APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "Resource has been modified."
+    default_code = "precondition_failed"
+
+
+def recipe_etag(recipe_id, revision):
+    return quote_etag(f"{recipe_id}-{revision}")
+
+
+def check_preconditions(request, etag):
+    """Raise `PreconditionFailed` when If-Match/If-None-Match rule out a
+    write to the resource currently tagged `etag`."""
+    response = get_conditional_response(request, etag=etag)
+
+    if response is not None and response.status_code == 412:
+        raise PreconditionFailed()
+
+
+def list_cache_key(basename, user_id, host, params):
+    """Return the cache namespace, key and ETag of a list request."""
+    namespace = f"{basename}-list"
+    key = cache.make_key(namespace, user_scope(user_id), host, sorted(params.lists()))
+    etag = quote_etag(hashlib.md5(key.encode(), usedforsecurity=False).hexdigest())
+
+    return namespace, key, etag
+
+
+def not_modified(request, etag):
+    response = get_conditional_response(request, etag=etag)
+
+    if response is not None:
+        response["ETag"] = etag
+
+    return response
+
+
+def tag_list_response(response, etag):
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+
+    return response
+
+
+class CachedListMixin:
+    """Serve `list` from the cache, keyed by user, data version and query.
+
+    Any change to the user's recipes, tags or ingredients bumps the
+    version (see `recipe.signals`), so stale entries are never read again.
+    The ETag is derived from the key, which lets `If-None-Match` be
+    answered without touching the cached body. No Last-Modified is sent:
+    the cache only knows when it was filled, not when the data changed.
+    """
+
+    def list(self, request, *args, **kwargs):
+        namespace, key, etag = list_cache_key(
+            self.basename, request.user.pk, request.get_host(), request.query_params
+        )
+
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        entry = cache.get_or_set(
+            namespace, key, lambda: self._list_entry(request, *args, **kwargs)
+        )
+
+        return tag_list_response(Response(entry["data"]), etag)
+
+    def _list_entry(self, request, *args, **kwargs):
+        return {"data": super().list(request, *args, **kwargs).data}
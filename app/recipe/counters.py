@@ -0,0 +1,54 @@
+"""
+Maintenance of the denormalized `recipe_count` of tags and ingredients
+"""
+
+from collections import defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def adjusted_count(delta):
+    """`recipe_count + delta`, never below zero.
+
+    Concurrent changes can make a count drift; a drifted zero must not
+    fail the write on the field's CHECK constraint. `recompute_recipe_counts`
+    repairs the drift.
+    """
+    if delta < 0:
+        return Greatest(F("recipe_count") + delta, 0)
+
+    return F("recipe_count") + delta
+
+
+def adjust_recipe_counts(model, deltas):
+    """Add `deltas[pk]` to the count of each tag or ingredient in place,
+    with one UPDATE per distinct delta."""
+    by_delta = defaultdict(list)
+
+    for pk, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(pk)
+
+    for delta, pks in by_delta.items():
+        model.objects.filter(pk__in=pks).update(recipe_count=adjusted_count(delta))
+
+
+def recompute_recipe_counts(model):
+    """Recount every row of `model` from the join table, return how many
+    counts were wrong."""
+    field = model._meta.model_name
+    counts = (
+        model.recipe_set.through.objects.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    actual = Coalesce(Subquery(counts), 0)
+
+    return (
+        model.objects.annotate(actual=actual)
+        .exclude(recipe_count=F("actual"))
+        .update(recipe_count=actual)
+    )
@@ -0,0 +1,89 @@
+"""
+List filtering shared by the sync and async recipe app views
+"""
+
+from django.db.models import Exists, OuterRef
+
+from core.models import Recipe
+from recipe import search
+from recipe.serializers import RecipeAttrFilterSerializer, RecipeFilterSerializer
+
+
+def params_to_ints(qs):
+    return [int(str_id) for str_id in qs.split(",")]
+
+
+def validated(serializer_class, query_params):
+    filters = serializer_class(data=query_params)
+    filters.is_valid(raise_exception=True)
+
+    return filters.validated_data
+
+
+def _linked_to(through, fk, ids, match):
+    links = through.objects.filter(recipe_id=OuterRef("pk"))
+
+    if match == "all":
+        return [Exists(links.filter(**{fk: pk})) for pk in set(ids)]
+
+    return [Exists(links.filter(**{f"{fk}__in": ids}))]
+
+
+def filter_recipes(queryset, user, query_params):
+    """Apply the recipe list's query parameters to `queryset`, raising
+    `ValidationError` for invalid ones. No query is run."""
+    tags = query_params.get("tags")
+    ingredients = query_params.get("ingredients")
+    query = query_params.get("search", "").strip()
+
+    params = validated(RecipeFilterSerializer, query_params)
+    match = params["match"]
+
+    # EXISTS per filter instead of joins, so no row is duplicated and
+    # no DISTINCT is needed
+    if tags:
+        tag_ids = params_to_ints(tags)
+        queryset = queryset.filter(
+            *_linked_to(Recipe.tags.through, "tag_id", tag_ids, match)
+        )
+    if ingredients:
+        ingredient_ids = params_to_ints(ingredients)
+        queryset = queryset.filter(
+            *_linked_to(
+                Recipe.ingredients.through, "ingredient_id", ingredient_ids, match
+            )
+        )
+
+    ranges = {
+        "time_minutes__gte": params.get("time_minutes_min"),
+        "time_minutes__lte": params.get("time_minutes_max"),
+        "price__gte": params.get("price_min"),
+        "price__lte": params.get("price_max"),
+    }
+    queryset = queryset.filter(
+        **{lookup: value for lookup, value in ranges.items() if value is not None}
+    )
+
+    queryset = queryset.filter(user=user).order_by("-id")
+
+    if query:
+        queryset = search.search(queryset, query)
+    # "-id" last keeps the order total, which cursor pagination needs
+    if "ordering" in params:
+        queryset = queryset.order_by(params["ordering"], "-id")
+
+    return queryset.prefetch_related("tags", "ingredients")
+
+
+def filter_recipe_attrs(queryset, user, params):
+    """Apply validated `RecipeAttrFilterSerializer` data to a tag or
+    ingredient queryset."""
+    queryset = queryset.filter(user=user)
+
+    # recipe_count is indexed with the user, so neither filter joins
+    if params["assigned_only"]:
+        queryset = queryset.filter(recipe_count__gt=0)
+    if params["unused"]:
+        queryset = queryset.filter(recipe_count=0)
+
+    return queryset.order_by(*RecipeAttrFilterSerializer.ORDERINGS[params["ordering"]])
@@ -0,0 +1,152 @@
+"""
+Background generation of resized recipe image variants
+"""
+
+import io
+import os
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import DatabaseError, transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+
+from core.media import content_version
+from core.models import ImageJob, Recipe
+
+# name: (longest side in px, Pillow format, file extension)
+VARIANTS = {
+    "thumbnail": (200, "JPEG", "jpg"),
+    "medium": (800, "JPEG", "jpg"),
+    "webp": (800, "WEBP", "webp"),
+}
+
+VARIANT_DIR = "uploads/recipe/variants"
+
+STALE_JOB_TIMEOUT = timedelta(minutes=10)
+
+
+def stored_name(recipe, variant=None):
+    if variant:
+        return recipe.image_variants.get(variant)
+
+    return recipe.image.name or None
+
+
+def image_url(recipe, variant=None, request=None):
+    """URL of the owner-only image endpoint, pinned to the current content
+    so it can be cached for good; None when there is no such image."""
+    name = stored_name(recipe, variant)
+
+    if name is None:
+        return None
+
+    params = {"variant": variant} if variant else {}
+    params["v"] = content_version(name)
+    url = reverse("recipe:recipe-image", args=[recipe.pk]) + "?" + urlencode(params)
+
+    return request.build_absolute_uri(url) if request else url
+
+
+def enqueue(recipe):
+    return ImageJob.objects.create(recipe=recipe, image_name=recipe.image.name)
+
+
+def requeue_stale_jobs(timeout=STALE_JOB_TIMEOUT):
+    """Hand jobs left running by a dead worker back to the queue."""
+    return ImageJob.objects.filter(
+        status=ImageJob.RUNNING, updated_at__lt=timezone.now() - timeout
+    ).update(status=ImageJob.PENDING, updated_at=timezone.now())
+
+
+def claim_job():
+    with transaction.atomic():
+        job = (
+            ImageJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ImageJob.PENDING)
+            .order_by("id")
+            .first()
+        )
+
+        if job is not None:
+            job.status = ImageJob.RUNNING
+            job.save(update_fields=["status", "updated_at"])
+
+    return job
+
+
+def _encode(image, size, image_format):
+    image = image.copy()
+    image.thumbnail((size, size))
+
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, quality=85)
+
+    return buffer.getvalue()
+
+
+def generate_variants(storage, name):
+    """Write every variant of the stored image `name`, return their names."""
+    from PIL import Image, ImageOps
+
+    stem = os.path.splitext(os.path.basename(name))[0]
+    largest = max(size for size, _, _ in VARIANTS.values())
+    variants = {}
+
+    with storage.open(name, "rb") as source, Image.open(source) as image:
+        # lets the JPEG decoder downscale while decoding
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image)
+
+        for variant, (size, image_format, ext) in VARIANTS.items():
+            data = _encode(image, size, image_format)
+            variants[variant] = storage.save(
+                f"{VARIANT_DIR}/{stem}_{variant}.{ext}", ContentFile(data)
+            )
+
+    return variants
+
+
+def _fail(job, exc):
+    job.status = ImageJob.FAILED
+    job.error = str(exc) or exc.__class__.__name__
+    job.save(update_fields=["status", "error", "updated_at"])
+
+
+def _apply_variants(job, variants):
+    with transaction.atomic():
+        recipe = Recipe.objects.select_for_update().filter(pk=job.recipe_id).first()
+
+        # skip recipes whose image was replaced while the job ran
+        if recipe is not None and recipe.image.name == job.image_name:
+            recipe.image_variants = variants
+            recipe.save(update_fields=["image_variants"])
+
+        job.status = ImageJob.DONE
+        job.save(update_fields=["status", "updated_at"])
+
+
+def run_job(job):
+    """Process `job` without raising, so one job cannot stop a worker.
+
+    A job that cannot finish is marked failed. If not even that can be
+    saved it stays running, and `requeue_stale_jobs` hands it back later.
+    """
+    storage = Recipe._meta.get_field("image").storage
+
+    try:
+        _apply_variants(job, generate_variants(storage, job.image_name))
+    except Exception as exc:
+        # as stored, in case not even the failure can be saved
+        job.status = ImageJob.RUNNING
+
+        try:
+            _fail(job, exc)
+        except DatabaseError:
+            pass
+
+    return job
@@ -0,0 +1,309 @@
+"""
+Streaming bulk import of recipes
+"""
+
+import codecs
+import json
+import re
+from collections import Counter
+from itertools import chain
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from core.models import Recipe, Tag, Ingredient
+from recipe import search
+from recipe.caching import invalidate_user
+from recipe.counters import adjust_recipe_counts
+from recipe.serializers import RecipeDetailSerializer, resolve_by_name
+
+READ_SIZE = 64 * 1024
+CHUNK_SIZE = 500
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _read_chunks(stream):
+    if stream is None:
+        return
+
+    while True:
+        chunk = stream.read(READ_SIZE)
+
+        if not chunk:
+            return
+
+        yield chunk
+
+
+def _parse_line(line):
+    if not line.strip():
+        return
+
+    try:
+        yield json.loads(line), None
+    except ValueError:
+        yield None, "invalid JSON"
+
+
+def iter_ndjson(chunks):
+    """Yield a (row, error) pair for every non-blank line."""
+    pending = b""
+
+    for chunk in chunks:
+        *lines, pending = (pending + chunk).split(b"\n")
+
+        for line in lines:
+            yield from _parse_line(line)
+
+    yield from _parse_line(pending)
+
+
+class JSONArrayReader:
+    """Decode the items of a top level JSON array one at a time."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        chunk = next(self._chunks, b"")
+        self._eof = not chunk
+        self._buf = self._buf[self._pos:] + self._text.decode(chunk, final=self._eof)
+        self._pos = 0
+
+        return not self._eof
+
+    def _peek(self):
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars):
+        char = self._peek()
+
+        if not char or char not in chars:
+            raise ValueError(f"expected one of {chars!r}")
+
+        self._pos += 1
+
+        return char
+
+    def _decode(self):
+        self._peek()
+
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except ValueError:
+                if self._eof:
+                    raise
+            else:
+                # a value touching the end of the buffer may still be cut off
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+
+            self._fill()
+
+    def __iter__(self):
+        self._expect("[")
+
+        if self._peek() == "]":
+            return
+
+        while True:
+            yield self._decode()
+
+            if self._expect(",]") == "]":
+                return
+
+
+def iter_json_array(chunks):
+    """Yield a (row, error) pair per array item, stopping at the first
+    syntax error since the rest of the document cannot be recovered."""
+    try:
+        for row in JSONArrayReader(chunks):
+            yield row, None
+    except ValueError:
+        yield None, "invalid JSON"
+
+
+def iter_rows(stream):
+    """Detect the body format from its first byte and yield its rows."""
+    chunks = _read_chunks(stream)
+
+    for chunk in chunks:
+        if chunk.strip():
+            break
+    else:
+        return
+
+    chunks = chain([chunk], chunks)
+
+    if chunk.lstrip()[:1] == b"[":
+        yield from iter_json_array(chunks)
+    else:
+        yield from iter_ndjson(chunks)
+
+
+class ImportAborted(Exception):
+    """Stops an import at `row`; the chunks saved before it stay committed."""
+
+    def __init__(self, row, detail):
+        super().__init__(detail)
+        self.row = row
+        self.detail = detail
+
+
+class RecipeImporter:
+    """Validate rows one by one and write them in chunks.
+
+    Tag and ingredient names are resolved once per import and reused by
+    every later row that mentions them. Each chunk commits on its own, so
+    an import stopped by the row limit or a database error reports what
+    was already created along with where it stopped.
+    """
+
+    def __init__(self, request, chunk_size=None, max_rows=None):
+        self.request = request
+        self.user = request.user
+        self.chunk_size = chunk_size or CHUNK_SIZE
+        self.max_rows = max_rows or settings.RECIPE_IMPORT_MAX_ROWS
+        self._resolved = {Tag: {}, Ingredient: {}}
+
+    def run(self, stream):
+        results = []
+        error = None
+
+        try:
+            self._import(stream, results)
+        except ImportAborted as exc:
+            error = {"row": exc.row, "detail": exc.detail}
+
+        # bulk writes bypass the model signals
+        invalidate_user(self.user.pk)
+
+        results.sort(key=lambda result: result["row"])
+        created = sum(result["status"] == "created" for result in results)
+        report = {
+            "created": created,
+            "failed": len(results) - created,
+            "results": results,
+        }
+
+        if error:
+            report["error"] = error
+
+        return report
+
+    def _import(self, stream, results):
+        pending = []
+
+        for row_number, (row, error) in enumerate(iter_rows(stream)):
+            if row_number >= self.max_rows:
+                self._flush(pending, results)
+                raise ImportAborted(
+                    row_number, f"imports are limited to {self.max_rows} rows"
+                )
+
+            if error:
+                results.append(self._error(row_number, [error]))
+                continue
+
+            serializer = RecipeDetailSerializer(
+                data=row, context={"request": self.request}
+            )
+
+            if serializer.is_valid():
+                pending.append((row_number, serializer.validated_data))
+            else:
+                results.append(self._error(row_number, serializer.errors))
+
+            if len(pending) >= self.chunk_size:
+                self._flush(pending, results)
+                pending = []
+
+        self._flush(pending, results)
+
+    def _flush(self, pending, results):
+        if not pending:
+            return
+
+        try:
+            results.extend(self._save(pending))
+        except DatabaseError:
+            results.extend(self._error(row, ["not saved"]) for row, _ in pending)
+            raise ImportAborted(
+                pending[0][0], "rows could not be saved, the import stopped here"
+            )
+
+    def _error(self, row_number, errors):
+        return {"row": row_number, "status": "error", "errors": errors}
+
+    def _resolve(self, model, field, pending):
+        resolved = self._resolved[model]
+        names = [
+            item["name"]
+            for _, data in pending
+            for item in data.get(field, [])
+            if item["name"] not in resolved
+        ]
+
+        for obj in resolve_by_name(model, self.user, names):
+            resolved[obj.name] = obj
+
+        return resolved
+
+    def _links(self, field, fk, resolved, recipes, pending):
+        through = getattr(Recipe, field).through
+
+        return [
+            through(recipe_id=recipe.id, **{fk: resolved[name].id})
+            for recipe, (_, data) in zip(recipes, pending)
+            for name in dict.fromkeys(item["name"] for item in data.get(field, []))
+        ]
+
+    @transaction.atomic
+    def _save(self, pending):
+        tags = self._resolve(Tag, "tags", pending)
+        ingredients = self._resolve(Ingredient, "ingredients", pending)
+
+        recipes = Recipe.objects.bulk_create(
+            [
+                Recipe(
+                    user=self.user,
+                    **{
+                        key: value
+                        for key, value in data.items()
+                        if key not in ("tags", "ingredients")
+                    },
+                )
+                for _, data in pending
+            ]
+        )
+
+        tag_links = Recipe.tags.through.objects.bulk_create(
+            self._links("tags", "tag_id", tags, recipes, pending)
+        )
+        ingredient_links = Recipe.ingredients.through.objects.bulk_create(
+            self._links("ingredients", "ingredient_id", ingredients, recipes, pending)
+        )
+        adjust_recipe_counts(Tag, Counter(link.tag_id for link in tag_links))
+        adjust_recipe_counts(
+            Ingredient, Counter(link.ingredient_id for link in ingredient_links)
+        )
+        search.index_recipes([recipe.id for recipe in recipes])
+
+        return [
+            {"row": row_number, "status": "created", "id": recipe.id}
+            for recipe, (row_number, _) in zip(recipes, pending)
+        ]
@@ -0,0 +1,86 @@
+"""
+Process queued recipe image jobs
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from recipe import images
+
+
+def _run_in_thread(job):
+    try:
+        return images.run_job(job)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    """Django command to generate recipe image variants in a worker pool"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+        parser.add_argument(
+            "--requeue-interval",
+            type=float,
+            default=60.0,
+            help="Seconds between checks for jobs left running by dead workers.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(options["workers"], 1)
+        requeue_at = 0
+
+        pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+
+        try:
+            while True:
+                if time.monotonic() >= requeue_at:
+                    self._requeue()
+                    requeue_at = time.monotonic() + options["requeue_interval"]
+
+                jobs = self._claim(workers)
+
+                if pool is None:
+                    done = [images.run_job(job) for job in jobs]
+                else:
+                    done = list(pool.map(_run_in_thread, jobs))
+
+                for job in done:
+                    self.stdout.write(f"job {job.id}: {job.status}")
+
+                if not jobs:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    def _requeue(self):
+        requeued = images.requeue_stale_jobs()
+
+        if requeued:
+            self.stdout.write(f"requeued {requeued} stale jobs")
+
+    def _claim(self, count):
+        jobs = []
+
+        while len(jobs) < count:
+            job = images.claim_job()
+
+            if job is None:
+                break
+
+            jobs.append(job)
+
+        return jobs
@@ -0,0 +1,21 @@
+"""
+Recount how many recipes use each tag and ingredient
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Ingredient, Tag
+from recipe.counters import recompute_recipe_counts
+
+
+class Command(BaseCommand):
+    """Django command to repair drifted tag and ingredient recipe counts"""
+
+    def handle(self, *args, **options):
+        for model in (Tag, Ingredient):
+            with transaction.atomic():
+                fixed = recompute_recipe_counts(model)
+
+            name = model._meta.verbose_name_plural
+            self.stdout.write(f"fixed {fixed} {name}")
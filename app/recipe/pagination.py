@@ -0,0 +1,32 @@
+from rest_framework.pagination import CursorPagination
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Keyset pagination over the view's ordering, enabled per request.
+
+    Clients opt in by sending ``page_size`` or ``cursor``; without either
+    the list endpoint keeps returning a plain list.
+    """
+
+    ordering = "-id"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        # follow an ordering chosen by the view, such as search rank; the
+        # view ends it with "-id" so positions stay unique
+        if queryset.query.order_by:
+            return tuple(queryset.query.order_by)
+
+        return super().get_ordering(request, queryset, view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+
+        if self.cursor_query_param not in params and (
+            self.page_size_query_param not in params
+        ):
+            return None
+
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,80 @@
+"""
+Ranked full-text search over recipe titles and descriptions
+"""
+
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast
+
+from core.models import Recipe, RecipeSearchTerm
+
+# the trigger in core migration 0011 uses the same config and weights
+SEARCH_CONFIG = "english"
+WEIGHTS = {"title": 1.0, "description": 0.4}
+
+TERM_MAX_LENGTH = RecipeSearchTerm._meta.get_field("term").max_length
+
+
+def uses_full_text():
+    return connection.vendor == "postgresql"
+
+
+def tokenize(text):
+    return [term[:TERM_MAX_LENGTH] for term in re.findall(r"\w+", text.lower())]
+
+
+def index_recipes(recipe_ids):
+    """Rebuild the inverted index entries of the given recipes.
+
+    Only needed without PostgreSQL, whose search vectors are maintained
+    by a trigger on every write.
+    """
+    if uses_full_text():
+        return
+
+    RecipeSearchTerm.objects.filter(recipe_id__in=recipe_ids).delete()
+    terms = []
+
+    for values in Recipe.objects.filter(pk__in=recipe_ids).values("id", *WEIGHTS):
+        weights = {}
+
+        # later fields win, so a term in the title gets the title's weight
+        for field, weight in sorted(WEIGHTS.items(), key=lambda item: item[1]):
+            for term in tokenize(values[field]):
+                weights[term] = weight
+
+        terms.extend(
+            RecipeSearchTerm(recipe_id=values["id"], term=term, weight=weight)
+            for term, weight in weights.items()
+        )
+
+    RecipeSearchTerm.objects.bulk_create(terms, batch_size=1000)
+
+
+def search(queryset, query):
+    """Narrow `queryset` to recipes matching every word of `query`, ordered
+    by relevance as `search_rank`, then newest first."""
+    if uses_full_text():
+        search_query = SearchQuery(
+            query, config=SEARCH_CONFIG, search_type="websearch"
+        )
+        # float8, so the rank survives a round trip through a page cursor
+        queryset = queryset.filter(search_vector=search_query).annotate(
+            search_rank=Cast(SearchRank(F("search_vector"), search_query), FloatField())
+        )
+    else:
+        terms = set(tokenize(query))
+        matches = (
+            RecipeSearchTerm.objects.filter(recipe=OuterRef("pk"), term__in=terms)
+            .order_by()
+            .values("recipe")
+        )
+        queryset = queryset.annotate(
+            search_hits=Subquery(matches.annotate(hits=Count("*")).values("hits")),
+            search_rank=Subquery(matches.annotate(rank=Sum("weight")).values("rank")),
+        ).filter(search_hits=len(terms))
+
+    return queryset.order_by("-search_rank", "-id")
@@ -1,7 +1,36 @@
 from django.contrib.auth import get_user_model, authenticate
+from django.db import transaction
 from rest_framework import serializers
 from django.utils.translation import gettext as _
-from core.models import Recipe, Tag, Ingredient
+from drf_spectacular.utils import extend_schema_field
+from recipe import images
+from recipe.uploads import BoundedImageField
+from core.models import ImageJob, Recipe, Tag, Ingredient
+
+
+def resolve_by_name(model, user, names):
+    """Return `model` rows for the given names, creating missing ones."""
+    names = list(dict.fromkeys(names))
+
+    if not names:
+        return []
+
+    found = {obj.name: obj for obj in model.objects.filter(user=user, name__in=names)}
+    missing = [name for name in names if name not in found]
+
+    if missing:
+        # rows inserted concurrently are skipped by the unique constraint
+        # and picked up by the re-read below
+        model.objects.bulk_create(
+            [model(user=user, name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        found.update(
+            (obj.name, obj)
+            for obj in model.objects.filter(user=user, name__in=missing)
+        )
+
+    return [found[name] for name in names]
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -18,7 +47,7 @@ class TagSerializer(serializers.ModelSerializer):
 class IngredientSerializer(serializers.ModelSerializer):
 
     class Meta:
-        model = Tag
+        model = Ingredient
         fields = [
             "id",
             "name",
@@ -26,6 +55,16 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
+class TagCountSerializer(TagSerializer):
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ["recipe_count"]
+
+
+class IngredientCountSerializer(IngredientSerializer):
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ["recipe_count"]
+
+
 class RecipeSerializer(serializers.ModelSerializer):
 
     tags = TagSerializer(many=True, required=False)
@@ -47,22 +86,18 @@ class RecipeSerializer(serializers.ModelSerializer):
             "image",
         ]
 
-    def _get_or_create_tags(self, tags, recipe):
+    def _resolve_by_name(self, model, items):
         auth_user = self.context["request"].user
 
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(user=auth_user, **tag)
-            recipe.tags.add(tag_obj)
+        return resolve_by_name(model, auth_user, [item["name"] for item in items])
 
-    def _get_or_create_ingredients(self, ingredients, recipe):
-        auth_user = self.context["request"].user
+    def _get_or_create_tags(self, tags, recipe):
+        recipe.tags.add(*self._resolve_by_name(Tag, tags))
 
-        for ingredient in ingredients:
-            ingredient_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user, **ingredient
-            )
-            recipe.ingredients.add(ingredient_obj)
+    def _get_or_create_ingredients(self, ingredients, recipe):
+        recipe.ingredients.add(*self._resolve_by_name(Ingredient, ingredients))
 
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop("tags", [])
         ingredients = validated_data.pop("ingredients", [])
@@ -74,17 +109,17 @@ class RecipeSerializer(serializers.ModelSerializer):
 
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop("tags", None)
         ingredients = validated_data.pop("ingredients", None)
 
+        # set() only inserts and deletes the links that actually changed
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            instance.tags.set(self._resolve_by_name(Tag, tags))
 
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+            instance.ingredients.set(self._resolve_by_name(Ingredient, ingredients))
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -96,14 +131,35 @@ class RecipeSerializer(serializers.ModelSerializer):
 
 class RecipeDetailSerializer(RecipeSerializer):
 
+    image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
+
     class Meta(RecipeSerializer.Meta):
         fields = RecipeSerializer.Meta.fields + [
             "description",
             "image",
+            "image_variants",
         ]
 
+    @extend_schema_field({"type": "string", "format": "uri", "nullable": True})
+    def get_image(self, recipe):
+        return images.image_url(recipe, request=self.context.get("request"))
+
+    @extend_schema_field(
+        {"type": "object", "additionalProperties": {"type": "string", "format": "uri"}}
+    )
+    def get_image_variants(self, recipe):
+        request = self.context.get("request")
+
+        return {
+            variant: images.image_url(recipe, variant, request)
+            for variant in recipe.image_variants
+        }
+
 
 class RecipeImageSerializer(serializers.ModelSerializer):
+    image = BoundedImageField(required=True)
+
     class Meta:
         model = Recipe
         fields = [
@@ -111,4 +167,69 @@ class RecipeImageSerializer(serializers.ModelSerializer):
             "image",
         ]
         read_only_fields = ["id"]
-        extra_kwargs = {"image": {"required": "True"}}
+
+    def to_representation(self, recipe):
+        data = super().to_representation(recipe)
+        data["image"] = images.image_url(recipe, request=self.context.get("request"))
+
+        return data
+
+
+class ImageJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImageJob
+        fields = [
+            "id",
+            "status",
+            "error",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = fields
+
+
+class RecipeFilterSerializer(serializers.Serializer):
+    """Query parameters narrowing and ordering the recipe list."""
+
+    ORDERING_FIELDS = ["time_minutes", "price", "title"]
+
+    match = serializers.ChoiceField(choices=["any", "all"], default="any")
+    time_minutes_min = serializers.IntegerField(required=False)
+    time_minutes_max = serializers.IntegerField(required=False)
+    price_min = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    price_max = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    ordering = serializers.ChoiceField(
+        choices=[
+            prefix + field for field in ORDERING_FIELDS for prefix in ("", "-")
+        ],
+        required=False,
+    )
+
+    def validate(self, attrs):
+        for field in ("time_minutes", "price"):
+            low = attrs.get(f"{field}_min")
+            high = attrs.get(f"{field}_max")
+
+            if low is not None and high is not None and low > high:
+                message = _("Must not be greater than {field}_max.")
+                raise serializers.ValidationError(
+                    {f"{field}_min": message.format(field=field)}
+                )
+
+        return attrs
+
+
+class RecipeAttrFilterSerializer(serializers.Serializer):
+    """Query parameters of the tag and ingredient lists."""
+
+    ORDERINGS = {
+        "name": ["name"],
+        "-name": ["-name"],
+        "recipe_count": ["recipe_count", "-name"],
+        "-recipe_count": ["-recipe_count", "-name"],
+    }
+
+    assigned_only = serializers.BooleanField(default=False)
+    unused = serializers.BooleanField(default=False)
+    with_counts = serializers.BooleanField(default=False)
+    ordering = serializers.ChoiceField(choices=list(ORDERINGS), default="-name")
@@ -0,0 +1,114 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from core.models import Recipe, Tag, Ingredient
+from recipe import search
+from recipe.caching import invalidate_user
+from recipe.counters import adjust_recipe_counts, adjusted_count
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_owner_lists(sender, instance, **kwargs):
+    # after commit: a read between the bump and the commit would cache the
+    # old rows under the new version
+    transaction.on_commit(partial(invalidate_user, instance.user_id))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_linked_lists(sender, instance, action, **kwargs):
+    if action.startswith("post_"):
+        transaction.on_commit(partial(invalidate_user, instance.user_id))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def start_new_user_lists(sender, instance, created, **kwargs):
+    # a fresh namespace, in case the id was used before
+    if created:
+        invalidate_user(instance.pk)
+
+
+def _bump_revisions(recipes):
+    recipes.update(revision=F("revision") + 1)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def bump_tagged_recipes(sender, instance, created=False, **kwargs):
+    # a renamed or removed tag changes how its recipes render
+    if not created:
+        _bump_revisions(Recipe.objects.filter(tags=instance))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def bump_recipes_with_ingredient(sender, instance, created=False, **kwargs):
+    if not created:
+        _bump_revisions(Recipe.objects.filter(ingredients=instance))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def bump_relinked_recipes(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            _bump_revisions(Recipe.objects.filter(pk=instance.pk))
+            instance.revision += 1
+    elif action in ("post_add", "post_remove"):
+        _bump_revisions(Recipe.objects.filter(pk__in=pk_set))
+    elif action == "pre_clear":
+        _bump_revisions(instance.recipe_set.all())
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe_text(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {"title", "description"} & set(update_fields):
+        search.index_recipes([instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def count_recipe_links(sender, instance, action, reverse, model, pk_set, **kwargs):
+    # removals are counted before the links go, when it is still known
+    # which of the requested ones exist; pk_set of post_add is new links only
+    if not reverse:
+        fk = f"{model._meta.model_name}_id"
+
+        if action == "post_add":
+            adjust_recipe_counts(model, dict.fromkeys(pk_set, 1))
+        elif action in ("pre_remove", "pre_clear"):
+            links = sender.objects.filter(recipe=instance)
+            if action == "pre_remove":
+                links = links.filter(**{f"{fk}__in": pk_set})
+
+            removed = links.values_list(fk, flat=True)
+            adjust_recipe_counts(model, dict.fromkeys(removed, -1))
+        return
+
+    counted = type(instance)
+    links = sender.objects.filter(**{counted._meta.model_name: instance})
+
+    if action == "post_add":
+        adjust_recipe_counts(counted, {instance.pk: len(pk_set)})
+    elif action == "pre_remove":
+        removed = links.filter(recipe_id__in=pk_set).count()
+        adjust_recipe_counts(counted, {instance.pk: -removed})
+    elif action == "pre_clear":
+        counted.objects.filter(pk=instance.pk).update(recipe_count=0)
+
+
+@receiver(pre_delete, sender=Recipe)
+def uncount_deleted_recipe(sender, instance, **kwargs):
+    # the cascade deletes the links without m2m_changed
+    for model in (Tag, Ingredient):
+        model.objects.filter(recipe=instance).update(recipe_count=adjusted_count(-1))
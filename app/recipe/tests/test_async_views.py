@@ -0,0 +1,172 @@
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import cache
+from core.models import Recipe, Tag
+
+RECIPES_URL = "/api/recipe/recipes/"
+TAGS_URL = "/api/recipe/tags/"
+
+
+def detail_url(recipe_id):
+    return f"{RECIPES_URL}{recipe_id}/"
+
+
+def create_recipe(user, **params):
+    defaults = {"title": "title", "time_minutes": 22, "price": Decimal("4.33")}
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+@override_settings(ROOT_URLCONF="app.urls_async")
+class AsyncReadTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("a@example.com", "pass123")
+        token = Token.objects.create(user=self.user)
+        self.headers = {"Authorization": f"Token {token.key}"}
+
+        self.client = AsyncClient()
+        self.sync_client = APIClient()
+        self.sync_client.force_authenticate(self.user)
+
+        self.tag = Tag.objects.create(user=self.user, name="vegan")
+        self.recipe = create_recipe(user=self.user, title="curry")
+        self.recipe.tags.add(self.tag)
+        create_recipe(user=self.user, title="stew")
+
+    @override_settings(ROOT_URLCONF="app.urls")
+    def _sync_get(self, path, params):
+        return self.sync_client.get(path, params)
+
+    async def test_auth_required(self):
+        res = await AsyncClient().get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res["WWW-Authenticate"], "Token")
+
+    async def test_session_not_accepted(self):
+        await self.client.aforce_login(self.user)
+
+        res = await self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_invalid_token(self):
+        res = await self.client.get(
+            RECIPES_URL, headers={"Authorization": "Token nope"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_recipe_list_matches_sync_view(self):
+        params = {"tags": str(self.tag.id)}
+
+        res = await self.client.get(RECIPES_URL, params, headers=self.headers)
+        sync_res = await sync_to_async(self._sync_get)(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), sync_res.json())
+        self.assertEqual([r["id"] for r in res.json()], [self.recipe.id])
+
+    async def test_recipe_list_shares_sync_cache(self):
+        sync_res = await sync_to_async(self._sync_get)(RECIPES_URL, {})
+
+        res = await self.client.get(
+            RECIPES_URL,
+            headers={**self.headers, "If-None-Match": sync_res["ETag"]},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        cache.reset_stats()
+        await self.client.get(TAGS_URL, headers=self.headers)
+        res = await self.client.get(TAGS_URL, headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(cache.stats()["tag-list"], {"hits": 1, "misses": 1})
+        self.assertEqual(res["Cache-Control"], "private, no-cache")
+
+    async def test_recipe_list_invalidated_by_writes(self):
+        res = await self.client.get(RECIPES_URL, headers=self.headers)
+        etag = res["ETag"]
+
+        def write():
+            with self.captureOnCommitCallbacks(execute=True):
+                create_recipe(user=self.user, title="soup")
+
+        await sync_to_async(write)()
+        res = await self.client.get(
+            RECIPES_URL, headers={**self.headers, "If-None-Match": etag}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()), 3)
+        self.assertNotEqual(res["ETag"], etag)
+
+    async def test_recipe_list_invalid_filter(self):
+        res = await self.client.get(
+            RECIPES_URL, {"ordering": "user"}, headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("ordering", res.json())
+
+    async def test_recipe_list_paginated_by_drf(self):
+        res = await self.client.get(
+            RECIPES_URL, {"page_size": 1}, headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()["results"]), 1)
+
+    async def test_recipe_detail_conditional(self):
+        res = await self.client.get(detail_url(self.recipe.id), headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["tags"], [{"id": self.tag.id, "name": "vegan"}])
+
+        res = await self.client.get(
+            detail_url(self.recipe.id),
+            headers={**self.headers, "If-None-Match": res["ETag"]},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_recipe_detail_of_other_user(self):
+        other = await get_user_model().objects.acreate(email="b@example.com")
+        recipe = await Recipe.objects.acreate(
+            user=other, title="x", time_minutes=1, price=Decimal("1")
+        )
+
+        res = await self.client.get(detail_url(recipe.id), headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_tag_list_with_counts(self):
+        res = await self.client.get(
+            TAGS_URL, {"with_counts": 1}, headers=self.headers
+        )
+
+        self.assertEqual(
+            res.json(), [{"id": self.tag.id, "name": "vegan", "recipe_count": 1}]
+        )
+
+    async def test_writes_use_drf_views(self):
+        payload = {"title": "soup", "time_minutes": 5, "price": "1.00"}
+
+        res = await self.client.post(
+            RECIPES_URL,
+            payload,
+            content_type="application/json",
+            headers=self.headers,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(await Recipe.objects.filter(title="soup").aexists())
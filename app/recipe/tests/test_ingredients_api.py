@@ -122,3 +122,14 @@ class PrivateIngredientsTagsAPITests(TestCase):
         res = self.client.get(INGREDIENTS_URL, {"assigned_only": 1})
 
         self.assertEqual(len(res.data), 1)
+
+    def test_list_with_counts(self):
+        ing = Ingredient.objects.create(user=self.user, name="eggs")
+        recipe = Recipe.objects.create(
+            title="title 1", time_minutes=4, price=Decimal("12.2"), user=self.user
+        )
+        recipe.ingredients.add(ing)
+
+        res = self.client.get(INGREDIENTS_URL, {"with_counts": 1})
+
+        self.assertEqual(res.data, [{"id": ing.id, "name": "eggs", "recipe_count": 1}])
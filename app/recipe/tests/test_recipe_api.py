@@ -1,13 +1,29 @@
 from decimal import Decimal
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import DatabaseError, connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Recipe, Tag, Ingredient
+from django.core.management import call_command
+
+from core import cache
+from core.models import ImageJob, Recipe, Tag, Ingredient
+from recipe import images
+from recipe.caching import user_scope
+from recipe.importers import RecipeImporter
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer, TagSerializer
+from recipe.pagination import RecipeCursorPagination
+from unittest.mock import patch
+import csv
+import io
+import json
+import shutil
 import tempfile
 import os
 
@@ -18,6 +34,14 @@ def image_upload_url(recipe_id):
     return reverse("recipe:recipe-upload-image", args=[recipe_id])
 
 
+def image_job_url(recipe_id):
+    return reverse("recipe:recipe-image-job", args=[recipe_id])
+
+
+def image_url(recipe_id):
+    return reverse("recipe:recipe-image", args=[recipe_id])
+
+
 def create_recipe(user, **params):
     defaults = {
         "title": "title",
@@ -384,6 +408,75 @@ class PrivateRecipeAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(recipe.ingredients.count(), 0)
 
+    def test_create_recipe_duplicate_names_deduplicated(self):
+        Tag.objects.create(user=self.user, name="dinner")
+        payload = {
+            "title": "new title",
+            "time_minutes": 10,
+            "price": Decimal("12.3"),
+            "tags": [{"name": "dinner"}, {"name": "thai"}, {"name": "thai"}],
+            "ingredients": [{"name": "salt"}, {"name": "salt"}],
+        }
+
+        res = self.client.post(RECIPE_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data["id"])
+        self.assertEqual(recipe.tags.count(), 2)
+        self.assertEqual(recipe.ingredients.count(), 1)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_create_recipe_query_count_independent_of_tags(self):
+        def payload(count):
+            return {
+                "title": "new title",
+                "time_minutes": 10,
+                "price": Decimal("12.3"),
+                "tags": [{"name": f"tag{i}-{count}"} for i in range(count)],
+                "ingredients": [{"name": f"ing{i}-{count}"} for i in range(count)],
+            }
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(RECIPE_URL, payload(2), format="json")
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(RECIPE_URL, payload(30), format="json")
+
+        self.assertEqual(len(small), len(large))
+
+    def test_update_unchanged_tags_no_join_writes(self):
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name="lunch"))
+        recipe.ingredients.add(Ingredient.objects.create(user=self.user, name="salt"))
+        payload = {"tags": [{"name": "lunch"}], "ingredients": [{"name": "salt"}]}
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(detail_url(recipe.id), payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        join_writes = [
+            q["sql"]
+            for q in ctx.captured_queries
+            if q["sql"].startswith(("INSERT", "DELETE")) and "core_recipe_" in q["sql"]
+        ]
+        self.assertEqual(join_writes, [])
+
+    def test_update_tags_partial_change(self):
+        keep = Tag.objects.create(user=self.user, name="keep")
+        drop = Tag.objects.create(user=self.user, name="drop")
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(keep, drop)
+        payload = {"tags": [{"name": "keep"}, {"name": "new"}]}
+
+        res = self.client.patch(detail_url(recipe.id), payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(t["name"] for t in res.data["tags"]), ["keep", "new"]
+        )
+        self.assertEqual(
+            set(recipe.tags.values_list("name", flat=True)), {"keep", "new"}
+        )
+
     def test_filter_by_tags(self):
         r1 = create_recipe(user=self.user, title="title 1")
         r2 = create_recipe(user=self.user, title="title 2")
@@ -432,9 +525,207 @@ class PrivateRecipeAPITests(TestCase):
         self.assertIn(s2.data, res.data)
         self.assertNotIn(s3.data, res.data)
 
+    def test_filter_by_tags_no_duplicates(self):
+        recipe = create_recipe(user=self.user)
+        tags = [Tag.objects.create(user=self.user, name=f"t{i}") for i in range(3)]
+        recipe.tags.add(*tags)
+
+        res = self.client.get(
+            RECIPE_URL, {"tags": ",".join(str(tag.id) for tag in tags)}
+        )
+
+        self.assertEqual([r["id"] for r in res.data], [recipe.id])
+
+    def test_filter_by_all_tags(self):
+        both = create_recipe(user=self.user, title="both")
+        one = create_recipe(user=self.user, title="one")
+        vegan = Tag.objects.create(user=self.user, name="Vegan")
+        quick = Tag.objects.create(user=self.user, name="Quick")
+        both.tags.add(vegan, quick)
+        one.tags.add(vegan)
+        params = {"tags": f"{vegan.id},{quick.id}"}
+
+        res_all = self.client.get(RECIPE_URL, {**params, "match": "all"})
+        res_any = self.client.get(RECIPE_URL, {**params, "match": "any"})
+
+        self.assertEqual([r["id"] for r in res_all.data], [both.id])
+        self.assertEqual([r["id"] for r in res_any.data], [one.id, both.id])
+
+    def test_filter_by_all_tags_and_ingredients(self):
+        match = create_recipe(user=self.user, title="match")
+        partial = create_recipe(user=self.user, title="partial")
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        salt = Ingredient.objects.create(user=self.user, name="Salt")
+        oil = Ingredient.objects.create(user=self.user, name="Oil")
+        match.tags.add(tag)
+        match.ingredients.add(salt, oil)
+        partial.tags.add(tag)
+        partial.ingredients.add(salt)
+        params = {
+            "tags": str(tag.id),
+            "ingredients": f"{salt.id},{oil.id}",
+            "match": "all",
+        }
+
+        res = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual([r["id"] for r in res.data], [match.id])
+
+    def test_filter_by_time_and_price_ranges(self):
+        quick_cheap = create_recipe(user=self.user, time_minutes=10, price="2.00")
+        create_recipe(user=self.user, time_minutes=45, price="2.00")
+        create_recipe(user=self.user, time_minutes=10, price="9.50")
+
+        res = self.client.get(
+            RECIPE_URL, {"time_minutes_max": 30, "price_max": "5", "price_min": "2"}
+        )
+
+        self.assertEqual([r["id"] for r in res.data], [quick_cheap.id])
+
+    def test_filter_invalid_range(self):
+        for params in (
+            {"time_minutes_min": "soon"},
+            {"price_min": "3", "price_max": "2"},
+        ):
+            res = self.client.get(RECIPE_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ordering(self):
+        cheap = create_recipe(user=self.user, title="b", price="1.00")
+        dear = create_recipe(user=self.user, title="a", price="8.00")
+        mid = create_recipe(user=self.user, title="c", price="4.00")
+
+        by_price = self.client.get(RECIPE_URL, {"ordering": "price"})
+        by_title = self.client.get(RECIPE_URL, {"ordering": "-title"})
+
+        self.assertEqual(
+            [r["id"] for r in by_price.data], [cheap.id, mid.id, dear.id]
+        )
+        self.assertEqual(
+            [r["id"] for r in by_title.data], [mid.id, cheap.id, dear.id]
+        )
+
+    def test_ordering_not_whitelisted(self):
+        res = self.client.get(RECIPE_URL, {"ordering": "user__password"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ordering_paginated_with_ties(self):
+        recipes = [
+            create_recipe(user=self.user, time_minutes=minutes)
+            for minutes in (30, 10, 30, 20, 10, 30)
+        ]
+        expected = [
+            r.id for r in sorted(recipes, key=lambda r: (r.time_minutes, -r.id))
+        ]
+
+        res = self.client.get(
+            RECIPE_URL, {"ordering": "time_minutes", "page_size": 2}
+        )
+        seen = [r["id"] for r in res.data["results"]]
+
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            seen += [r["id"] for r in res.data["results"]]
+
+        self.assertEqual(seen, expected)
+
+    def test_filter_invalid_match(self):
+        res = self.client.get(RECIPE_URL, {"match": "most"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_by_tags_without_distinct(self):
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        create_recipe(user=self.user).tags.add(tag)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(RECIPE_URL, {"tags": str(tag.id)})
+
+        recipe_query = ctx.captured_queries[0]["sql"]
+        self.assertIn("EXISTS", recipe_query)
+        self.assertNotIn("DISTINCT", recipe_query)
+
+    def test_list_unpaginated_by_default(self):
+        create_recipe(user=self.user)
+
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(res.data, list)
+
+    def test_list_cursor_pagination(self):
+        recipes = [create_recipe(user=self.user, title=f"r{i}") for i in range(5)]
+        expected_ids = [r.id for r in reversed(recipes)]
+
+        res = self.client.get(RECIPE_URL, {"page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r["id"] for r in res.data["results"]], expected_ids[:2])
+        self.assertIsNone(res.data["previous"])
+
+        seen = [r["id"] for r in res.data["results"]]
+        next_url = res.data["next"]
+
+        while next_url:
+            res = self.client.get(next_url)
+            seen += [r["id"] for r in res.data["results"]]
+            next_url = res.data["next"]
+
+        self.assertEqual(seen, expected_ids)
+
+    def test_list_page_size_capped(self):
+        create_recipe(user=self.user)
+
+        with patch.object(RecipeCursorPagination, "max_page_size", 1):
+            create_recipe(user=self.user)
+            res = self.client.get(RECIPE_URL, {"page_size": 1000})
+
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertIsNotNone(res.data["next"])
+
+    def _create_recipes_with_relations(self, count):
+        for i in range(count):
+            recipe = create_recipe(user=self.user, title=f"r{i}")
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f"t{recipe.id}"))
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f"i{recipe.id}")
+            )
+
+    def test_list_query_count_constant(self):
+        self._create_recipes_with_relations(3)
+
+        # recipes + prefetched tags + prefetched ingredients
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPE_URL)
+        self.assertEqual(len(res.data), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_recipes_with_relations(20)
+
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPE_URL)
+        self.assertEqual(len(res.data), 23)
+
+    def test_detail_query_count(self):
+        self._create_recipes_with_relations(1)
+        recipe = Recipe.objects.get(user=self.user)
+
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(recipe.id))
+        self.assertEqual(len(res.data["tags"]), 1)
+        self.assertEqual(len(res.data["ingredients"]), 1)
+
 
 class ImageUploadTests(TestCase):
     def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
         self.client = APIClient()
 
         self.user = create_user(email="test@asdads.com", password="som1243")
@@ -464,6 +755,258 @@ class ImageUploadTests(TestCase):
         self.assertIn("image", res.data)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    def _jpeg_bytes(self, size=(10, 10)):
+        buffer = io.BytesIO()
+        Image.new("RGB", size).save(buffer, format="JPEG")
+
+        return buffer.getvalue()
+
+    def _upload(self, size=(10, 10)):
+        upload = SimpleUploadedFile("a.jpg", self._jpeg_bytes(size), "image/jpeg")
+
+        return self.client.post(
+            image_upload_url(self.recipe.id), {"image": upload}, format="multipart"
+        )
+
+    def _process_jobs(self):
+        call_command(
+            "process_image_jobs", "--once", "--workers", "1", stdout=io.StringIO()
+        )
+
+    def test_upload_image_queues_job(self):
+        res = self._upload()
+
+        self.assertEqual(res.data["image_job"]["status"], ImageJob.PENDING)
+        job = ImageJob.objects.get(id=res.data["image_job"]["id"])
+        self.recipe.refresh_from_db()
+        self.assertEqual(job.image_name, self.recipe.image.name)
+        self.assertEqual(self.recipe.image_variants, {})
+
+    def test_upload_image_kept_only_with_job(self):
+        self._upload()
+        self.recipe.refresh_from_db()
+        image_name = self.recipe.image.name
+
+        with patch("recipe.images.enqueue", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self._upload(size=(20, 20))
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image.name, image_name)
+        self.assertEqual(ImageJob.objects.filter(recipe=self.recipe).count(), 1)
+
+    def test_process_image_jobs_creates_variants(self):
+        self._upload(size=(1600, 1200))
+
+        self._process_jobs()
+
+        self.recipe.refresh_from_db()
+        variants = self.recipe.image_variants
+        storage = self.recipe.image.storage
+        self.assertEqual(set(variants), set(images.VARIANTS))
+
+        with Image.open(storage.path(variants["thumbnail"])) as thumbnail:
+            self.assertEqual(thumbnail.size, (200, 150))
+        with Image.open(storage.path(variants["webp"])) as webp:
+            self.assertEqual(webp.format, "WEBP")
+
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertTrue(
+            res.data["image_variants"]["medium"].startswith("http://testserver/")
+        )
+
+        res = self.client.get(image_job_url(self.recipe.id))
+        self.assertEqual(res.data["status"], ImageJob.DONE)
+
+    def test_failed_job_reported(self):
+        self._upload()
+        self.recipe.refresh_from_db()
+        with self.recipe.image.storage.open(self.recipe.image.name, "wb") as f:
+            f.write(b"corrupt")
+
+        self._process_jobs()
+
+        res = self.client.get(image_job_url(self.recipe.id))
+        self.assertEqual(res.data["status"], ImageJob.FAILED)
+        self.assertNotEqual(res.data["error"], "")
+
+    def test_database_error_fails_job_without_stopping_worker(self):
+        self._upload()
+        other = create_recipe(user=self.user)
+        self.client.post(
+            image_upload_url(other.id),
+            {"image": SimpleUploadedFile("b.jpg", self._jpeg_bytes((20, 20)))},
+            format="multipart",
+        )
+        apply_variants = images._apply_variants
+
+        def fail_first(job, variants):
+            if job.recipe_id == self.recipe.id:
+                raise DatabaseError("connection lost")
+
+            return apply_variants(job, variants)
+
+        with patch("recipe.images._apply_variants", side_effect=fail_first):
+            self._process_jobs()
+
+        self.assertEqual(
+            dict(ImageJob.objects.values_list("recipe_id", "status")),
+            {self.recipe.id: ImageJob.FAILED, other.id: ImageJob.DONE},
+        )
+        self.assertEqual(
+            ImageJob.objects.get(recipe=self.recipe).error, "connection lost"
+        )
+
+    def test_stale_running_job_requeued(self):
+        self._upload()
+        ImageJob.objects.update(
+            status=ImageJob.RUNNING,
+            updated_at=timezone.now() - images.STALE_JOB_TIMEOUT * 2,
+        )
+
+        self._process_jobs()
+
+        self.assertEqual(ImageJob.objects.get().status, ImageJob.DONE)
+
+    def test_superseded_job_does_not_apply_variants(self):
+        self._upload(size=(10, 10))
+        job = ImageJob.objects.get(recipe=self.recipe)
+        self._upload(size=(20, 20))
+
+        images.run_job(job)
+
+        self.recipe.refresh_from_db()
+        self.assertNotEqual(self.recipe.image.name, job.image_name)
+        self.assertEqual(self.recipe.image_variants, {})
+
+    def test_identical_uploads_stored_once(self):
+        other = create_recipe(user=self.user)
+        self._upload()
+        self.client.post(
+            image_upload_url(other.id),
+            {"image": SimpleUploadedFile("b.jpg", self._jpeg_bytes(), "image/jpeg")},
+            format="multipart",
+        )
+
+        self.recipe.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.recipe.image.name, other.image.name)
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=100)
+    def test_upload_image_too_many_bytes(self):
+        res = self._upload(size=(200, 200))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("bytes", str(res.data["image"][0]))
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=99)
+    def test_upload_image_too_many_pixels(self):
+        res = self._upload(size=(10, 10))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("pixels", str(res.data["image"][0]))
+
+    def test_upload_image_wrong_magic_bytes(self):
+        upload = SimpleUploadedFile("fake.jpg", b"GIF8 not really", "image/jpeg")
+
+        res = self.client.post(
+            image_upload_url(self.recipe.id), {"image": upload}, format="multipart"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_image_truncated_header(self):
+        upload = SimpleUploadedFile("bad.png", b"\x89PNG\r\n\x1a\n", "image/png")
+
+        res = self.client.post(
+            image_upload_url(self.recipe.id), {"image": upload}, format="multipart"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_png_image(self):
+        buffer = io.BytesIO()
+        Image.new("RGBA", (10, 10)).save(buffer, format="PNG")
+        upload = SimpleUploadedFile("image.png", buffer.getvalue(), "image/png")
+
+        res = self.client.post(
+            image_upload_url(self.recipe.id), {"image": upload}, format="multipart"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertTrue(self.recipe.image.name.endswith(".png"))
+
+    def test_image_job_not_found(self):
+        res = self.client.get(image_job_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_image_served_with_immutable_caching(self):
+        self._upload()
+
+        url = self.client.get(detail_url(self.recipe.id)).data["image"]
+        res = self.client.get(url)
+
+        self.assertTrue(url.startswith("http://testserver" + image_url(self.recipe.id)))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "image/jpeg")
+        self.assertIn("immutable", res["Cache-Control"])
+        self.assertIn("private", res["Cache-Control"])
+        self.assertEqual(b"".join(res.streaming_content), self._jpeg_bytes())
+
+    def test_unversioned_image_revalidated(self):
+        self._upload()
+
+        res = self.client.get(image_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("immutable", res["Cache-Control"])
+        self.assertIn("no-cache", res["Cache-Control"])
+
+    def test_old_image_version_redirects(self):
+        self._upload(size=(10, 10))
+        old_url = self.client.get(detail_url(self.recipe.id)).data["image"]
+        self._upload(size=(20, 20))
+        self.recipe.refresh_from_db()
+
+        res = self.client.get(old_url)
+
+        self.assertEqual(res.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(res["Location"], images.image_url(self.recipe))
+
+    @override_settings(MEDIA_DELIVERY="accel")
+    def test_image_offloaded_to_proxy(self):
+        self._upload()
+        self._process_jobs()
+        self.recipe.refresh_from_db()
+
+        res = self.client.get(image_url(self.recipe.id), {"variant": "thumbnail"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res["X-Accel-Redirect"],
+            "/protected-media/" + self.recipe.image_variants["thumbnail"],
+        )
+        self.assertEqual(res.content, b"")
+
+    def test_image_not_available(self):
+        res = self.client.get(image_url(self.recipe.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        self._upload()
+
+        res = self.client.get(image_url(self.recipe.id), {"variant": "huge"})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_image_of_other_user_not_served(self):
+        other = create_user(email="other@example.com", password="pass123")
+        recipe = create_recipe(user=other)
+
+        res = self.client.get(image_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_upload_image_bad_request(self):
         url = image_upload_url(self.recipe.id)
         payload = {"image": "not_an_image"}
@@ -475,3 +1018,464 @@ class ImageUploadTests(TestCase):
         )
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+IMPORT_URL = reverse("recipe:recipe-import")
+
+
+class RecipeImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = create_user(email="test@asdads.com", password="som1243")
+
+        self.client.force_authenticate(self.user)
+
+    def _row(self, title, tags=(), ingredients=()):
+        return {
+            "title": title,
+            "time_minutes": 5,
+            "price": "1.50",
+            "tags": [{"name": name} for name in tags],
+            "ingredients": [{"name": name} for name in ingredients],
+        }
+
+    def _post(self, body, content_type="application/x-ndjson"):
+        return self.client.generic("POST", IMPORT_URL, body, content_type)
+
+    def test_import_ndjson(self):
+        rows = [
+            self._row("a", tags=["dinner", "thai"], ingredients=["salt"]),
+            self._row("b", tags=["dinner"], ingredients=["salt", "salt"]),
+        ]
+        body = "\n".join(json.dumps(row) for row in rows) + "\n"
+
+        res = self._post(body)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual(res.data["failed"], 0)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 1)
+
+        recipe = Recipe.objects.get(id=res.data["results"][1]["id"])
+        self.assertEqual(recipe.title, "b")
+        self.assertEqual(recipe.user, self.user)
+        self.assertEqual(list(recipe.tags.values_list("name", flat=True)), ["dinner"])
+        self.assertEqual(recipe.ingredients.count(), 1)
+        self.assertEqual(
+            dict(Tag.objects.values_list("name", "recipe_count")),
+            {"dinner": 2, "thai": 1},
+        )
+        self.assertEqual(Ingredient.objects.get(name="salt").recipe_count, 2)
+
+    @patch("recipe.importers.READ_SIZE", 7)
+    def test_import_json_array_across_reads(self):
+        rows = [self._row(f"r{i}", tags=["ü"]) for i in range(3)]
+
+        res = self._post(json.dumps(rows), "application/json")
+
+        self.assertEqual(res.data["created"], 3)
+        self.assertEqual(
+            list(Recipe.objects.order_by("id").values_list("title", flat=True)),
+            ["r0", "r1", "r2"],
+        )
+        self.assertEqual(Tag.objects.get(user=self.user).name, "ü")
+
+    @patch("recipe.importers.CHUNK_SIZE", 2)
+    def test_import_reports_invalid_rows(self):
+        body = "\n".join(
+            [
+                json.dumps(self._row("ok")),
+                "{not json",
+                json.dumps({"title": "missing fields"}),
+                json.dumps(self._row("ok too")),
+            ]
+        )
+
+        res = self._post(body)
+
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual(res.data["failed"], 2)
+        self.assertEqual(
+            [r["status"] for r in res.data["results"]],
+            ["created", "error", "error", "created"],
+        )
+        self.assertIn("time_minutes", res.data["results"][2]["errors"])
+
+    def test_import_truncated_array(self):
+        body = "[" + json.dumps(self._row("ok")) + ', {"title": '
+
+        res = self._post(body, "application/json")
+
+        self.assertEqual(res.data["created"], 1)
+        self.assertEqual(res.data["results"][1]["status"], "error")
+
+    def test_import_empty_body(self):
+        res = self._post("")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 0)
+
+    @override_settings(RECIPE_IMPORT_MAX_BYTES=100)
+    def test_import_body_too_large(self):
+        res = self._post(json.dumps(self._row("x" * 100)))
+
+        self.assertEqual(res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertFalse(Recipe.objects.exists())
+
+    @override_settings(RECIPE_IMPORT_MAX_ROWS=2)
+    def test_import_stops_at_row_limit(self):
+        body = "\n".join(json.dumps(self._row(f"r{i}")) for i in range(3))
+
+        res = self._post(body)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual(res.data["error"]["row"], 2)
+        self.assertEqual(Recipe.objects.count(), 2)
+
+    @patch("recipe.importers.CHUNK_SIZE", 2)
+    def test_import_reports_committed_chunks_on_db_error(self):
+        body = "\n".join(json.dumps(self._row(f"r{i}")) for i in range(5))
+        save = RecipeImporter._save
+
+        def fail_second_chunk(importer, pending):
+            if pending[0][0] == 2:
+                raise DatabaseError
+
+            return save(importer, pending)
+
+        with patch.object(RecipeImporter, "_save", fail_second_chunk):
+            res = self._post(body)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual(res.data["failed"], 2)
+        self.assertEqual(res.data["error"]["row"], 2)
+        self.assertEqual(
+            list(Recipe.objects.order_by("id").values_list("title", flat=True)),
+            ["r0", "r1"],
+        )
+
+
+EXPORT_URL = reverse("recipe:recipe-export")
+
+
+class RecipeExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = create_user(email="test@asdads.com", password="som1243")
+
+        self.client.force_authenticate(self.user)
+
+    def _create(self, title, tags=()):
+        recipe = create_recipe(user=self.user, title=title)
+
+        for name in tags:
+            tag, _ = Tag.objects.get_or_create(user=self.user, name=name)
+            recipe.tags.add(tag)
+
+        return recipe
+
+    def test_export_ndjson(self):
+        r1 = self._create("one", tags=["a", "b"])
+        r2 = self._create("two")
+        create_recipe(user=create_user(email="o@asd.com", password="pass123"))
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        lines = b"".join(res.streaming_content).splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row["id"] for row in rows], [r2.id, r1.id])
+        self.assertEqual(sorted(t["name"] for t in rows[1]["tags"]), ["a", "b"])
+        self.assertEqual(rows[1]["description"], r1.description)
+
+    def test_export_csv(self):
+        self._create("one", tags=["a"])
+
+        res = self.client.get(EXPORT_URL, {"file_format": "csv"})
+
+        self.assertEqual(res["Content-Type"], "text/csv")
+        text = b"".join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(text)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["title"], "one")
+        self.assertEqual(rows[0]["tags"], "a")
+
+    def test_export_invalid_format(self):
+        res = self.client.get(EXPORT_URL, {"file_format": "xml"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch("recipe.exporters.EXPORT_CHUNK_SIZE", 2)
+    def test_export_prefetches_per_chunk(self):
+        for i in range(4):
+            self._create(f"r{i}", tags=[f"t{i}"])
+
+        res = self.client.get(EXPORT_URL)
+
+        # one cursor over recipes, tags and ingredients fetched per chunk
+        with self.assertNumQueries(5):
+            rows = b"".join(res.streaming_content).splitlines()
+        self.assertEqual(len(rows), 4)
+
+
+class RecipeListCacheTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = create_user(email="test@asdads.com", password="som1243")
+
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_list_served_from_cache(self):
+        create_recipe(user=self.user)
+        self.client.get(RECIPE_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_changes_invalidate_list(self):
+        recipe = create_recipe(user=self.user)
+        self.client.get(RECIPE_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.tags.add(Tag.objects.create(user=self.user, name="new"))
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.data[0]["tags"][0]["name"], "new")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.data, [])
+
+    def test_lists_invalidated_only_after_commit(self):
+        self.client.get(RECIPE_URL)
+        version = cache.get_version(user_scope(self.user.pk))
+        payload = {"title": "soup", "time_minutes": 5, "price": Decimal("1.50")}
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(RECIPE_URL, payload)
+
+            # a read racing the write still finds the old version
+            self.assertEqual(cache.get_version(user_scope(self.user.pk)), version)
+
+        for callback in callbacks:
+            callback()
+
+        self.assertNotEqual(cache.get_version(user_scope(self.user.pk)), version)
+        self.assertEqual(len(self.client.get(RECIPE_URL).data), 1)
+
+    def test_cache_per_user_and_query(self):
+        create_recipe(user=self.user)
+        other = create_user(email="other@asdads.com", password="som1243")
+        self.client.get(RECIPE_URL)
+
+        self.client.force_authenticate(other)
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.data, [])
+
+        self.client.force_authenticate(self.user)
+        res = self.client.get(RECIPE_URL, {"page_size": 1})
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_if_none_match_not_modified(self):
+        create_recipe(user=self.user)
+        res = self.client.get(RECIPE_URL)
+        etag = res["ETag"]
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_recipe(user=self.user)
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_no_last_modified(self):
+        res = self.client.get(RECIPE_URL)
+
+        self.assertNotIn("Last-Modified", res)
+
+        # the fill time says nothing about changes made in the same second
+        create_recipe(user=self.user)
+        res = self.client.get(
+            RECIPE_URL, HTTP_IF_MODIFIED_SINCE="Fri, 31 Dec 2100 00:00:00 GMT"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_import_invalidates_list(self):
+        self.client.get(RECIPE_URL)
+
+        row = {"title": "a", "time_minutes": 5, "price": "1.50"}
+        self.client.generic(
+            "POST", IMPORT_URL, json.dumps(row), "application/x-ndjson"
+        )
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(res.data), 1)
+
+
+class RecipeConditionalRequestTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = create_user(email="test@asdads.com", password="som1243")
+
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+        self.url = detail_url(self.recipe.id)
+
+    def test_detail_not_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+    def test_etag_changes_on_update(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        res = self.client.patch(self.url, {"title": "new"})
+        self.assertNotEqual(res["ETag"], etag)
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["title"], "new")
+
+    def test_etag_changes_on_tag_rename(self):
+        tag = Tag.objects.create(user=self.user, name="old")
+        self.recipe.tags.add(tag)
+        etag = self.client.get(self.url)["ETag"]
+
+        tag.name = "new"
+        tag.save()
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["tags"][0]["name"], "new")
+
+    def test_etag_changes_on_reverse_link(self):
+        tag = Tag.objects.create(user=self.user, name="t")
+        etag = self.client.get(self.url)["ETag"]
+
+        tag.recipe_set.add(self.recipe)
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_with_stale_if_match_rejected(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.client.patch(self.url, {"title": "first"})
+
+        res = self.client.patch(self.url, {"title": "second"}, HTTP_IF_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.title, "first")
+
+    def test_update_with_current_if_match(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        res = self.client.patch(self.url, {"title": "new"}, HTTP_IF_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_delete_with_stale_if_match_rejected(self):
+        self.client.get(self.url)
+
+        res = self.client.delete(self.url, HTTP_IF_MATCH='"stale"')
+
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertTrue(Recipe.objects.filter(id=self.recipe.id).exists())
+
+
+class RecipeSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = create_user(email="test@asdads.com", password="som1243")
+
+        self.client.force_authenticate(self.user)
+
+    def _search(self, query, **params):
+        res = self.client.get(RECIPE_URL, {"search": query, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res
+
+    def test_search_matches_title_and_description(self):
+        by_title = create_recipe(user=self.user, title="Green curry")
+        by_description = create_recipe(
+            user=self.user, title="Dinner", description="a mild curry"
+        )
+        create_recipe(user=self.user, title="Pancakes", description="sweet")
+
+        res = self._search("curry")
+
+        self.assertEqual(
+            [r["id"] for r in res.data], [by_title.id, by_description.id]
+        )
+
+    def test_search_requires_every_word(self):
+        both = create_recipe(user=self.user, title="Chicken curry")
+        create_recipe(user=self.user, title="Chicken soup")
+
+        res = self._search("curry chicken")
+
+        self.assertEqual([r["id"] for r in res.data], [both.id])
+
+    def test_search_limited_to_user(self):
+        other = create_user(email="other@example.com", password="pass123")
+        create_recipe(user=other, title="Curry")
+
+        res = self._search("curry")
+
+        self.assertEqual(res.data, [])
+
+    def test_search_follows_updates(self):
+        recipe = create_recipe(user=self.user, title="Soup")
+
+        self.client.patch(detail_url(recipe.id), {"title": "Curry"}, format="json")
+
+        self.assertEqual(len(self._search("curry").data), 1)
+        self.assertEqual(self._search("soup").data, [])
+
+    def test_search_finds_imported_recipes(self):
+        row = {"title": "Lentil curry", "time_minutes": 5, "price": "1.00"}
+        self.client.generic(
+            "POST", IMPORT_URL, json.dumps(row), "application/x-ndjson"
+        )
+
+        self.assertEqual(len(self._search("lentil").data), 1)
+
+    def test_search_paginated_by_rank(self):
+        for i in range(3):
+            create_recipe(user=self.user, title=f"Curry {i}", description="x")
+            create_recipe(user=self.user, title=f"Stew {i}", description="curry")
+        ranked = [r["id"] for r in self._search("curry").data]
+
+        res = self._search("curry", page_size=2)
+        seen = [r["id"] for r in res.data["results"]]
+
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            seen += [r["id"] for r in res.data["results"]]
+
+        self.assertEqual(seen, ranked)
+        titles = [Recipe.objects.get(id=i).title for i in ranked]
+        self.assertTrue(all(t.startswith("Curry") for t in titles[:3]))
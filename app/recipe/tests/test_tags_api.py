@@ -1,4 +1,7 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 
@@ -77,6 +80,16 @@ class PrivateTagsAPITests(TestCase):
 
         self.assertEqual(tag.name, payload["name"])
 
+    def test_update_tag_duplicate_name(self):
+        Tag.objects.create(user=self.user, name="dessert")
+        tag = Tag.objects.create(user=self.user, name="asd")
+
+        res = self.client.patch(detail_url(tag.id), {"name": "dessert"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, "asd")
+
     def test_delete_tag(self):
         tag = Tag.objects.create(user=self.user, name="breakfast")
 
@@ -121,3 +134,160 @@ class PrivateTagsAPITests(TestCase):
         res = self.client.get(TAGS_URL, {"assigned_only": 1})
 
         self.assertEqual(len(res.data), 1)
+
+    def test_renamed_tag_not_served_stale(self):
+        tag = Tag.objects.create(user=self.user, name="old")
+        self.client.get(TAGS_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(detail_url(tag.id), {"name": "new"})
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.data[0]["name"], "new")
+
+    def test_assigned_only_follows_recipe_links(self):
+        tag = Tag.objects.create(user=self.user, name="breakfast")
+        recipe = Recipe.objects.create(
+            title="title 1", time_minutes=4, price=Decimal("12.2"), user=self.user
+        )
+        self.client.get(TAGS_URL, {"assigned_only": 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.tags.add(tag)
+        res = self.client.get(TAGS_URL, {"assigned_only": 1})
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_list_with_counts(self):
+        used = Tag.objects.create(user=self.user, name="breakfast")
+        unused = Tag.objects.create(user=self.user, name="lunch")
+        for i in range(2):
+            recipe = Recipe.objects.create(
+                title=f"title {i}", time_minutes=4, price=Decimal("1"), user=self.user
+            )
+            recipe.tags.add(used)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TAGS_URL, {"with_counts": 1})
+
+        self.assertEqual(
+            res.data,
+            [
+                {"id": unused.id, "name": "lunch", "recipe_count": 0},
+                {"id": used.id, "name": "breakfast", "recipe_count": 2},
+            ],
+        )
+
+    def test_assigned_only_with_counts(self):
+        tag = Tag.objects.create(user=self.user, name="breakfast")
+        Tag.objects.create(user=self.user, name="lunch")
+        recipe = Recipe.objects.create(
+            title="title 1", time_minutes=4, price=Decimal("1"), user=self.user
+        )
+        recipe.tags.add(tag)
+
+        res = self.client.get(TAGS_URL, {"assigned_only": 1, "with_counts": 1})
+
+        self.assertEqual(
+            res.data, [{"id": tag.id, "name": tag.name, "recipe_count": 1}]
+        )
+
+    def _recipe(self, title="title"):
+        return Recipe.objects.create(
+            title=title, time_minutes=4, price=Decimal("1"), user=self.user
+        )
+
+    def _counts(self, *tags):
+        return [Tag.objects.get(pk=tag.pk).recipe_count for tag in tags]
+
+    def test_recipe_count_follows_recipe_links(self):
+        a, b, c = (Tag.objects.create(user=self.user, name=n) for n in "abc")
+        recipe = self._recipe()
+
+        recipe.tags.add(a, b)
+        recipe.tags.add(a)
+        self.assertEqual(self._counts(a, b, c), [1, 1, 0])
+
+        recipe.tags.remove(b, c)
+        self.assertEqual(self._counts(a, b, c), [1, 0, 0])
+
+        recipe.tags.set([b, c])
+        self.assertEqual(self._counts(a, b, c), [0, 1, 1])
+
+        recipe.tags.clear()
+        self.assertEqual(self._counts(a, b, c), [0, 0, 0])
+
+    def test_recipe_count_follows_tag_links(self):
+        tag = Tag.objects.create(user=self.user, name="a")
+        first, second = self._recipe("1"), self._recipe("2")
+
+        tag.recipe_set.add(first, second)
+        self.assertEqual(self._counts(tag), [2])
+
+        tag.recipe_set.remove(first, first)
+        self.assertEqual(self._counts(tag), [1])
+
+        tag.recipe_set.clear()
+        self.assertEqual(self._counts(tag), [0])
+
+    def test_recipe_count_follows_recipe_delete(self):
+        tag = Tag.objects.create(user=self.user, name="a")
+        for title in ("1", "2"):
+            self._recipe(title).tags.add(tag)
+
+        Recipe.objects.filter(title="1").delete()
+
+        self.assertEqual(self._counts(tag), [1])
+
+    def test_drifted_zero_count_does_not_fail_writes(self):
+        tag = Tag.objects.create(user=self.user, name="a")
+        first, second = self._recipe("1"), self._recipe("2")
+        first.tags.add(tag)
+        second.tags.add(tag)
+        Tag.objects.filter(pk=tag.pk).update(recipe_count=0)
+
+        first.tags.remove(tag)
+        res = self.client.delete(reverse("recipe:recipe-detail", args=[second.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self._counts(tag), [0])
+
+    def test_tag_save_keeps_recipe_count(self):
+        tag = Tag.objects.create(user=self.user, name="a")
+        self._recipe().tags.add(tag)
+
+        tag.name = "b"
+        tag.save()
+
+        self.assertEqual(self._counts(tag), [1])
+
+    def test_recompute_recipe_counts(self):
+        tag = Tag.objects.create(user=self.user, name="a")
+        self._recipe().tags.add(tag)
+        Tag.objects.filter(pk=tag.pk).update(recipe_count=7)
+        out = StringIO()
+
+        call_command("recompute_recipe_counts", stdout=out)
+
+        self.assertEqual(self._counts(tag), [1])
+        self.assertIn("fixed 1 tags", out.getvalue())
+
+    def test_order_by_popularity_and_unused(self):
+        rare = Tag.objects.create(user=self.user, name="rare")
+        common = Tag.objects.create(user=self.user, name="common")
+        unused = Tag.objects.create(user=self.user, name="unused")
+        self._recipe("1").tags.add(rare, common)
+        self._recipe("2").tags.add(common)
+
+        popular = self.client.get(TAGS_URL, {"ordering": "-recipe_count"})
+        empty = self.client.get(TAGS_URL, {"unused": 1})
+
+        self.assertEqual(
+            [t["id"] for t in popular.data], [common.id, rare.id, unused.id]
+        )
+        self.assertEqual([t["id"] for t in empty.data], [unused.id])
+
+    def test_invalid_ordering(self):
+        res = self.client.get(TAGS_URL, {"ordering": "user"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,87 @@
+"""
+Cheap, header-only validation of uploaded recipe images
+"""
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+
+# leading bytes of every accepted format, mapped to Pillow's format name
+MAGIC_NUMBERS = [
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+    (b"GIF87a", "GIF"),
+    (b"GIF89a", "GIF"),
+]
+
+
+def sniff_format(header):
+    for magic, image_format in MAGIC_NUMBERS:
+        if header.startswith(magic):
+            return image_format
+
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "WEBP"
+
+    return None
+
+
+class BoundedImageUploadHandler(TemporaryFileUploadHandler):
+    """Stream uploads straight to a temporary file on disk, keeping at most
+    `RECIPE_IMAGE_MAX_BYTES` of it.
+
+    The rest of an oversized upload is read and dropped, and the file
+    still reports its real size so validation can reject it.
+    """
+
+    def receive_data_chunk(self, raw_data, start):
+        remaining = settings.RECIPE_IMAGE_MAX_BYTES - start
+
+        if remaining > 0:
+            self.file.write(raw_data[:remaining])
+
+
+class BoundedImageField(serializers.ImageField):
+    """Image field that checks magic bytes, byte size and pixel count from
+    the file header, without decoding the image."""
+
+    default_error_messages = {
+        "too_large": _("Image must not exceed {max_bytes} bytes."),
+        "too_many_pixels": _("Image must not exceed {max_pixels} pixels."),
+        "unsupported": _("Upload a JPEG, PNG, GIF or WebP image."),
+    }
+
+    def to_internal_value(self, data):
+        # Pillow is only needed by uploads, keep it out of worker start-up
+        from PIL import Image
+
+        file_object = serializers.FileField.to_internal_value(self, data)
+
+        if file_object.size > settings.RECIPE_IMAGE_MAX_BYTES:
+            self.fail("too_large", max_bytes=settings.RECIPE_IMAGE_MAX_BYTES)
+
+        file_object.seek(0)
+        image_format = sniff_format(file_object.read(16))
+
+        if image_format is None:
+            self.fail("unsupported")
+
+        file_object.seek(0)
+
+        try:
+            # Image.open only parses the header, pixel data stays undecoded
+            with Image.open(file_object, formats=[image_format]) as image:
+                width, height = image.size
+        except Image.DecompressionBombError:
+            self.fail("too_many_pixels", max_pixels=settings.RECIPE_IMAGE_MAX_PIXELS)
+        except (OSError, SyntaxError, ValueError):
+            self.fail("invalid_image")
+
+        if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+            self.fail("too_many_pixels", max_pixels=settings.RECIPE_IMAGE_MAX_PIXELS)
+
+        file_object.seek(0)
+        file_object.content_type = Image.MIME[image_format]
+
+        return file_object
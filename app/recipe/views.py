@@ -4,65 +4,127 @@ from drf_spectacular.utils import (
     OpenApiParameter,
     OpenApiTypes,
 )
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.utils.cache import get_conditional_response
+from django.utils.translation import gettext as _
 from rest_framework import (
     generics,
-    authentication,
     permissions,
     viewsets,
     mixins,
     status,
 )
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from recipe.serializers import (
     RecipeSerializer,
     RecipeDetailSerializer,
     TagSerializer,
+    TagCountSerializer,
     IngredientSerializer,
+    IngredientCountSerializer,
     RecipeImageSerializer,
+    ImageJobSerializer,
+    RecipeFilterSerializer,
+    RecipeAttrFilterSerializer,
 )
+from recipe import images
+from recipe.caching import CachedListMixin, check_preconditions, recipe_etag
+from recipe.exporters import EXPORT_FORMATS
+from recipe.filters import filter_recipe_attrs, filter_recipes, validated
+from recipe.importers import RecipeImporter
+from recipe.pagination import RecipeCursorPagination
+from recipe.uploads import BoundedImageUploadHandler
+from core.authentication import CachedTokenAuthentication
+from core.media import content_version, media_response
 from core.models import Recipe, Tag, Ingredient
 
 
-@extend_schema_view(
-    list=extend_schema(
-        parameters=[
-            OpenApiParameter(
-                "tags",
-                OpenApiTypes.STR,
-                description="Coma separated list of tags IDs to filter",
-            ),
-            OpenApiParameter(
-                "ingredients",
-                OpenApiTypes.STR,
-                description="Coma separated list of ingredients IDs to filter",
-            ),
-        ]
-    )
-)
-class RecipeViewSet(viewsets.ModelViewSet):
+RECIPE_FILTER_PARAMETERS = [
+    OpenApiParameter(
+        "tags",
+        OpenApiTypes.STR,
+        description="Coma separated list of tags IDs to filter",
+    ),
+    OpenApiParameter(
+        "ingredients",
+        OpenApiTypes.STR,
+        description="Coma separated list of ingredients IDs to filter",
+    ),
+    OpenApiParameter(
+        "match",
+        OpenApiTypes.STR,
+        enum=["any", "all"],
+        default="any",
+        description=(
+            "Whether recipes need any or all of the given tags, and any or "
+            "all of the given ingredients"
+        ),
+    ),
+    OpenApiParameter(
+        "time_minutes_min",
+        OpenApiTypes.INT,
+        description="Only recipes taking at least this many minutes",
+    ),
+    OpenApiParameter(
+        "time_minutes_max",
+        OpenApiTypes.INT,
+        description="Only recipes taking at most this many minutes",
+    ),
+    OpenApiParameter(
+        "price_min",
+        OpenApiTypes.DECIMAL,
+        description="Only recipes costing at least this much",
+    ),
+    OpenApiParameter(
+        "price_max",
+        OpenApiTypes.DECIMAL,
+        description="Only recipes costing at most this much",
+    ),
+    OpenApiParameter(
+        "ordering",
+        OpenApiTypes.STR,
+        enum=RecipeFilterSerializer.ORDERING_FIELDS
+        + [f"-{field}" for field in RecipeFilterSerializer.ORDERING_FIELDS],
+        description=(
+            "Sort field, descending with a leading '-'; ties and the default "
+            "are newest first. Overrides search relevance"
+        ),
+    ),
+    OpenApiParameter(
+        "search",
+        OpenApiTypes.STR,
+        description=(
+            "Words that must all appear in the title or description; "
+            "results are ordered by relevance"
+        ),
+    ),
+]
+
+
+@extend_schema_view(list=extend_schema(parameters=RECIPE_FILTER_PARAMETERS))
+class RecipeViewSet(CachedListMixin, viewsets.ModelViewSet):
     serializer_class = RecipeDetailSerializer
     queryset = Recipe.objects.all()
+    pagination_class = RecipeCursorPagination
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
-    def _params_to_ints(self, qs):
-        return [int(str_id) for str_id in qs.split(",")]
+    # writes lock the row so the If-Match check and the save cannot race
+    locked_actions = ("update", "partial_update", "destroy")
 
     def get_queryset(self):
-        tags = self.request.query_params.get("tags")
-        ingredients = self.request.query_params.get("ingredients")
-        queryset = self.queryset
-
-        if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
-        if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+        if self.action in self.locked_actions:
+            return self.queryset.filter(user=self.request.user).select_for_update()
 
-        return queryset.filter(user=self.request.user).order_by("-id").distinct()
+        return filter_recipes(
+            self.queryset, self.request.user, self.request.query_params
+        )
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -72,20 +134,185 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return self.serializer_class
 
+    def get_object(self):
+        recipe = super().get_object()
+
+        if self.action in self.locked_actions:
+            check_preconditions(self.request, recipe_etag(recipe.id, recipe.revision))
+
+        return recipe
+
+    def retrieve(self, request, *args, **kwargs):
+        revision = self._current_revision()
+
+        if revision is not None:
+            etag = recipe_etag(self.kwargs["pk"], revision)
+            not_modified = get_conditional_response(request, etag=etag)
+
+            if not_modified is not None:
+                not_modified["ETag"] = etag
+                return not_modified
+
+        recipe = self.get_object()
+        self.headers["ETag"] = recipe_etag(recipe.id, recipe.revision)
+
+        return Response(self.get_serializer(recipe).data)
+
+    def _current_revision(self):
+        """Read just the revision, to answer If-None-Match without loading
+        or serializing the recipe."""
+        if "HTTP_IF_NONE_MATCH" not in self.request.META:
+            return None
+
+        try:
+            return (
+                self.queryset.filter(user=self.request.user, pk=self.kwargs["pk"])
+                .values_list("revision", flat=True)
+                .first()
+            )
+        except (TypeError, ValueError):
+            return None
+
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        return super().update(request, *args, **kwargs)
+
+    @transaction.atomic
+    def destroy(self, request, *args, **kwargs):
+        return super().destroy(request, *args, **kwargs)
+
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        recipe = serializer.save(user=self.request.user)
+        self.headers["ETag"] = recipe_etag(recipe.id, recipe.revision)
+
+    def perform_update(self, serializer):
+        recipe = serializer.save()
+        self.headers["ETag"] = recipe_etag(recipe.id, recipe.revision)
 
     @action(methods=["POST"], detail=True, url_path="upload_image")
     def upload_image(self, request, pk=None):
+        request.upload_handlers = [BoundedImageUploadHandler(request)]
         recipe = self.get_object()
         serializer = self.get_serializer(recipe, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            # variants are rebuilt by the process_image_jobs workers, so the
+            # new image must not be kept without a job to build them
+            with transaction.atomic():
+                recipe = serializer.save(image_variants={})
+                job = images.enqueue(recipe)
+
+            data = dict(serializer.data, image_job=ImageJobSerializer(job).data)
+
+            return Response(data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "variant",
+                OpenApiTypes.STR,
+                enum=list(images.VARIANTS),
+                description="Resized variant to return instead of the original",
+            ),
+            OpenApiParameter(
+                "v",
+                OpenApiTypes.STR,
+                description="Content version from the URLs in recipe details, "
+                "makes the response cacheable for good",
+            ),
+        ],
+        responses={(200, "image/*"): OpenApiTypes.BINARY},
+    )
+    @action(methods=["GET"], detail=True, url_path="image")
+    def image(self, request, pk=None):
+        recipe = self.get_object()
+        variant = request.query_params.get("variant")
+        name = images.stored_name(recipe, variant)
+
+        if not name:
+            raise NotFound(_("image not available"))
+
+        version = request.query_params.get("v")
+
+        # an old version must not be cached as the current content
+        if version and version != content_version(name):
+            return redirect(images.image_url(recipe, variant))
+
+        return media_response(recipe.image.storage, name, immutable=bool(version))
+
+    @extend_schema(responses=ImageJobSerializer)
+    @action(methods=["GET"], detail=True, url_path="image_job")
+    def image_job(self, request, pk=None):
+        recipe = self.get_object()
+        job = recipe.image_jobs.order_by("-id").first()
+
+        if job is None:
+            raise NotFound(_("no image uploaded"))
+
+        return Response(ImageJobSerializer(job).data)
+
+    @extend_schema(
+        request={
+            "application/x-ndjson": OpenApiTypes.BINARY,
+            "application/json": RecipeDetailSerializer(many=True),
+        },
+        responses={200: OpenApiTypes.OBJECT},
+        description="Bulk create recipes from a JSON array or NDJSON body. "
+        "Returns a per-row report, with a 400 and an `error` telling where "
+        "the import stopped when it could not finish.",
+    )
+    @action(methods=["POST"], detail=False, url_path="import", url_name="import")
+    def import_recipes(self, request):
+        max_bytes = settings.RECIPE_IMPORT_MAX_BYTES
+
+        if int(request.META.get("CONTENT_LENGTH") or 0) > max_bytes:
+            return Response(
+                {"detail": _("Imports must not exceed %d bytes.") % max_bytes},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+
+        # read the raw stream so the body is never parsed as a whole
+        report = RecipeImporter(request).run(request.stream)
+
+        if "error" in report:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(report, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=RECIPE_FILTER_PARAMETERS
+        + [
+            OpenApiParameter(
+                "file_format",
+                OpenApiTypes.STR,
+                enum=list(EXPORT_FORMATS),
+                description="Export format, ndjson by default",
+            ),
+        ],
+        responses={
+            (200, content_type): OpenApiTypes.BINARY
+            for _, content_type in EXPORT_FORMATS.values()
+        },
+    )
+    @action(methods=["GET"], detail=False, url_path="export")
+    def export(self, request):
+        file_format = request.query_params.get("file_format", "ndjson")
+
+        if file_format not in EXPORT_FORMATS:
+            raise ValidationError({"file_format": [_("unsupported format")]})
+
+        exporter, content_type = EXPORT_FORMATS[file_format]
+        response = StreamingHttpResponse(
+            exporter(self.get_queryset(), request), content_type=content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="recipes.{file_format}"'
+        )
+
+        return response
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -96,35 +323,72 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 enum=[0, 1],
                 description="Filter by items assigned to recipes",
             ),
+            OpenApiParameter(
+                "unused",
+                OpenApiTypes.INT,
+                enum=[0, 1],
+                description="Filter by items not assigned to any recipe",
+            ),
+            OpenApiParameter(
+                "with_counts",
+                OpenApiTypes.INT,
+                enum=[0, 1],
+                description="Include the number of recipes using each item",
+            ),
+            OpenApiParameter(
+                "ordering",
+                OpenApiTypes.STR,
+                enum=list(RecipeAttrFilterSerializer.ORDERINGS),
+                default="-name",
+                description="Sort by name or by number of recipes using the item",
+            ),
         ]
     )
 )
 class BaseRecipeAttrViewSet(
+    CachedListMixin,
     mixins.DestroyModelMixin,
     mixins.UpdateModelMixin,
     mixins.ListModelMixin,
     viewsets.GenericViewSet,
 ):
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_filters(self):
+        return validated(RecipeAttrFilterSerializer, self.request.query_params)
+
     def get_queryset(self):
-        assigned_only = bool(int(self.request.query_params.get("assigned_only", 0)))
-        queryset = self.queryset
+        if self.action != "list":
+            return self.queryset.filter(user=self.request.user)
 
-        if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+        return filter_recipe_attrs(
+            self.queryset, self.request.user, self.get_filters()
+        )
+
+    def get_serializer_class(self):
+        if self.action == "list" and self.get_filters()["with_counts"]:
+            return self.count_serializer_class
+
+        return self.serializer_class
 
-        return queryset.filter(user=self.request.user).order_by("-name").distinct()
+    def perform_update(self, serializer):
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError({"name": [_("name already exists")]})
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
 
     serializer_class = TagSerializer
+    count_serializer_class = TagCountSerializer
     queryset = Tag.objects.all()
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
 
     serializer_class = IngredientSerializer
+    count_serializer_class = IngredientCountSerializer
     queryset = Ingredient.objects.all()
@@ -1,13 +1,55 @@
+# with ASGI_READS=on, reads the async views in app.urls_async serve go to
+# the ASGI server; paginated ones stay on uWSGI like every other request
+map "${ASGI_READS}:$request_method $uri?$args" $recipe_read_backend {
+    default     uwsgi;
+    "~^on:(GET|HEAD) /api/recipe/(recipes/(\d+/)?|tags/|ingredients/)\?(?!(.*&)?(cursor|page_size)=)"  asgi;
+}
+
 server {
     listen ${LISTEN_PORT};
 
+    location /static/static/ {
+        alias /vol/static/static/;
+        gzip_static on;
+
+        # names hashed by the manifest storage never change their content
+        location ~ "\.[0-9a-f]{12}\.[^/]+$" {
+            add_header Cache-Control "public, max-age=31536000, immutable";
+        }
+    }
+
+    # media is access controlled, served only through /protected-media/
+    location /static/media/ {
+        internal;
+    }
+
     location /static {
         alias /vol/static;
     }
 
+    # reached only through X-Accel-Redirect from the app, whose
+    # Cache-Control nginx passes on
+    location /protected-media/ {
+        internal;
+        alias /vol/static/media/;
+    }
+
+    location /@asgi/ {
+        internal;
+        rewrite                 ^/@asgi(/.*)$ $1 break;
+        proxy_pass              http://${ASGI_HOST}:${ASGI_PORT};
+        proxy_set_header        Host $host;
+        proxy_set_header        X-Forwarded-For $proxy_add_x_forwarded_for;
+        proxy_set_header        X-Forwarded-Proto $scheme;
+    }
+
     location / {
+        if ($recipe_read_backend = asgi) {
+            rewrite             ^ /@asgi$uri last;
+        }
+
         uwsgi_pass              ${APP_HOST}:${APP_PORT};
         include                 /etc/nginx/uwsgi_params;
         client_max_body_size    10M;
     }
-}
\ No newline at end of file
+}
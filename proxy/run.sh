@@ -3,5 +3,7 @@
 # throw error
 set -e
 
-envsubst < /etc/nginx/default.conf.tpl > /etc/nginx/conf.d/default.conf
+# only our variables, nginx's own $variables must survive
+envsubst '${LISTEN_PORT} ${APP_HOST} ${APP_PORT} ${ASGI_HOST} ${ASGI_PORT} ${ASGI_READS}' \
+    < /etc/nginx/default.conf.tpl > /etc/nginx/conf.d/default.conf
 nginx -g 'daemon off;'
\ No newline at end of file
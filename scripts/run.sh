@@ -3,7 +3,8 @@
 set -e
 
 python manage.py wait_for_db
-python manage.py collectstatic --noinput
-python manage.py migrate
+# collectstatic and migrate, skipped when already up to date
+python manage.py prepare_app
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
+python manage.py uwsgi_config --output /vol/run/uwsgi.ini
+uwsgi --ini /vol/run/uwsgi.ini
@@ -0,0 +1,18 @@
+#!/bin/sh
+
+set -e
+
+# migrations and collectstatic are left to the uWSGI container (run.sh)
+python manage.py wait_for_db --migrations --timeout 300
+
+# the ORM runs one query at a time per worker, so match the concurrency of
+# uWSGI's default 2 * CPUs + 1 processes with 2 threads each
+CPUS=$(python -c "from core.management.commands.uwsgi_config import cpu_count; print(cpu_count())")
+
+uvicorn app.asgi:application \
+    --host 0.0.0.0 \
+    --port 9001 \
+    --workers "${ASGI_WORKERS:-$(( CPUS * 4 + 2 ))}" \
+    --proxy-headers \
+    --forwarded-allow-ips "*" \
+    --no-server-header